@@ -0,0 +1,57 @@
+"""
+Модуль асинхронных представлений для запуска под ASGI (uvicorn).
+
+DRF 3.12 не поддерживает асинхронные представления, поэтому тяжелые
+представления выполняются целиком в отдельном пуле потоков через
+sync_to_async(thread_sensitive=False): цикл событий воркера не ждет
+базу, а запросы не выстраиваются в очередь к единственному потоку
+синхронного кода Django. Каждый поток пула держит свое соединение с
+базой, размер пула ограничен настройкой ASYNC_VIEW_THREADS.
+
+Потоковые ответы читаются до конца в том же потоке: генератор строк
+обращается к базе, а Django под ASGI перебирает его в цикле событий.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+
+executor = ThreadPoolExecutor(max_workers=settings.ASYNC_VIEW_THREADS,
+                              thread_name_prefix='async-view')
+
+
+def materialize(response):
+    """Обычный ответ с содержимым потокового ответа."""
+    result = HttpResponse(b''.join(response.streaming_content),
+                          status=response.status_code)
+    for header, value in response.items():
+        result[header] = value
+    return result
+
+
+def run_view(view, request, *args, **kwargs):
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        if response.streaming:
+            response = materialize(response)
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    """Асинхронная обертка синхронного представления."""
+    run = sync_to_async(run_view, thread_sensitive=False, executor=executor)
+
+    # wraps переносит и признак csrf_exempt представления DRF.
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run(view, request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,88 @@
+"""
+Модуль аутентификации по токену с кэшем в памяти процесса.
+
+Пара (пользователь, токен) хранится в LRU кэше с ограниченным временем
+жизни. Вместе с записью запоминается поколение метки auth:<id> в кэше
+API (см. api.cache): выход, смена пароля, блокировка пользователя и
+удаление токена увеличивают поколение (см. api.signals), и записи
+других процессов перестают действовать при общем бэкенде кэша.
+"""
+import copy
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from .cache import get_generations, record
+
+
+def auth_label(user_id):
+    return f'auth:{user_id}'
+
+
+class TokenCache:
+    """LRU кэш токенов с временем жизни записей."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1:]
+
+    def set(self, key, user, token, generation):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, user, token,
+                                  generation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items()
+                        if entry[1].pk == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(settings.AUTH_TOKEN_CACHE_SIZE,
+                         settings.AUTH_TOKEN_CACHE_TTL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к базе для известных токенов."""
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is not None:
+            user, token, generation = entry
+            if get_generations([auth_label(user.pk)])[0] == generation:
+                record('auth_hit')
+                # Копия: представления могут менять атрибуты пользователя.
+                return copy.copy(user), token
+            token_cache.invalidate(key)
+        record('auth_miss')
+        user, token = super().authenticate_credentials(key)
+        generation = get_generations([auth_label(user.pk)])[0]
+        token_cache.set(key, user, token, generation)
+        return copy.copy(user), token
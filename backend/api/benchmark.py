@@ -0,0 +1,233 @@
+"""
+Модуль нагрузочного тестирования эндпоинтов API.
+
+Каждый сценарий выполняется заданное число раз в пуле потоков против
+запущенного сервера. Сценарии записи парные (добавление и удаление),
+поэтому повторные прогоны не меняют данные. Число SQL запросов берется
+из заголовка Server-Timing (см. foodgram.middleware).
+"""
+import base64
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import requests
+from PIL import Image
+
+SERVER_TIMING = re.compile(r'(\w+);(?:dur=([\d.]+)|desc="(\d+)")')
+
+
+def percentile(values, share):
+    """Процентиль по методу ближайшего ранга."""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(int(round(share * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for name, duration, description in SERVER_TIMING.findall(header or ''):
+        metrics[name] = float(duration or description)
+    return metrics
+
+
+def make_image():
+    buffer = BytesIO()
+    Image.new('RGB', (60, 40), (200, 120, 60)).save(buffer, 'PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+def get_scenarios(context):
+    """
+    Сценарии: имя -> список запросов (метод, путь, тело).
+
+    В путях подставляются {recipe} и {author} - очередные рецепт и автор
+    из контекста, не связанные с пользователем, и {id} - id созданного
+    в сценарии рецепта.
+    """
+    tags = '&'.join(f'tags={slug}' for slug in context['tag_slugs'])
+    recipe_body = {
+        'name': 'Нагрузочный рецепт', 'text': 'Описание',
+        'cooking_time': 10, 'image': context['image'],
+        'tags': context['tag_ids'],
+        'ingredients': [{'id': pk, 'amount': 10}
+                        for pk in context['ingredient_ids']],
+    }
+    # PATCH без тегов и ингредиентов не проходит валидацию.
+    recipe_patch = {'cooking_time': 5, 'tags': recipe_body['tags'],
+                    'ingredients': recipe_body['ingredients']}
+    batch = {'recipes': context['recipes'][:10]}
+    return {
+        'recipes_list': [('GET', '/api/recipes/', None)],
+        'recipes_cursor': [('GET', '/api/recipes/?cursor=', None)],
+        'recipes_tags': [('GET', f'/api/recipes/?{tags}', None)],
+        'recipes_author': [('GET', '/api/recipes/?author={author}', None)],
+        'recipes_search': [
+            ('GET', f'/api/recipes/?search={context["prefix"]}', None)],
+        'recipes_cookable': [
+            ('GET', '/api/recipes/cookable/?ingredients=' + ','.join(
+                str(pk) for pk in context['ingredient_ids']), None)],
+        'recipe_similar': [('GET', '/api/recipes/{recipe}/similar/', None)],
+        'recipes_recommended': [
+            ('GET', '/api/recipes/recommended/', None)],
+        'recipes_favorited': [
+            ('GET', '/api/recipes/?is_favorited=1', None)],
+        'recipe_detail': [('GET', '/api/recipes/{recipe}/', None)],
+        'tags_list': [('GET', '/api/tags/', None)],
+        'tag_detail': [('GET', f'/api/tags/{context["tag_ids"][0]}/', None)],
+        'ingredients_search': [
+            ('GET', f'/api/ingredients/?name={context["prefix"]}', None)],
+        'ingredient_detail': [
+            ('GET', f'/api/ingredients/{context["ingredient_ids"][0]}/',
+             None)],
+        'users_list': [('GET', '/api/users/', None)],
+        'user_detail': [('GET', '/api/users/{author}/', None)],
+        'users_me': [('GET', '/api/users/me/', None)],
+        'subscriptions': [
+            ('GET', '/api/users/subscriptions/?recipes_limit=3', None)],
+        'cart_preview': [('GET', '/api/recipes/shopping_cart/', None)],
+        'download_shopping_cart': [
+            ('GET', '/api/recipes/download_shopping_cart/', None)],
+        'favorite': [('POST', '/api/recipes/{recipe}/favorite/', None),
+                     ('DELETE', '/api/recipes/{recipe}/favorite/', None)],
+        'shopping_cart': [
+            ('POST', '/api/recipes/{recipe}/shopping_cart/', None),
+            ('DELETE', '/api/recipes/{recipe}/shopping_cart/', None)],
+        'favorite_batch': [('POST', '/api/recipes/favorite/', batch),
+                           ('DELETE', '/api/recipes/favorite/', batch)],
+        'cart_batch': [('POST', '/api/recipes/shopping_cart/', batch),
+                       ('DELETE', '/api/recipes/shopping_cart/', batch)],
+        'subscribe': [('POST', '/api/users/{author}/subscribe/', None),
+                      ('DELETE', '/api/users/{author}/subscribe/', None)],
+        'recipe_write': [('POST', '/api/recipes/', recipe_body),
+                         ('PATCH', '/api/recipes/{id}/', recipe_patch),
+                         ('DELETE', '/api/recipes/{id}/', None)],
+    }
+
+
+class Benchmark:
+    """Прогон сценариев с заданной конкурентностью."""
+
+    def __init__(self, base_url, token, concurrency=8, requests_count=200,
+                 timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self.context = None
+        self.concurrency = concurrency
+        self.requests_count = requests_count
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers['Authorization'] = f'Token {self.token}'
+            self.local.session = session
+        return session
+
+    def request(self, method, path, body=None):
+        started = time.perf_counter()
+        response = self.session().request(
+            method, self.base_url + path, json=body, timeout=self.timeout
+        )
+        # Потоковые ответы дочитываются: время включает их генерацию.
+        response.content
+        return response, (time.perf_counter() - started) * 1000
+
+    def run_scenario(self, number, steps):
+        """Проход сценария number: список измерений по шагам."""
+        recipes, authors = self.context['recipes'], self.context['authors']
+        values = {'recipe': recipes[number % len(recipes)],
+                  'author': authors[number % len(authors)], 'id': 0}
+        samples = []
+        for method, path, body in steps:
+            if body is not None and 'name' in body:
+                # Название рецепта уникально для автора.
+                body = {**body, 'name': f'{body["name"]} {number}'}
+            response, elapsed = self.request(
+                method, path.format(**values), body
+            )
+            if path == '/api/recipes/' and response.status_code == 201:
+                values['id'] = response.json()['id']
+            samples.append((method, response.status_code, elapsed,
+                            parse_server_timing(
+                                response.headers.get('Server-Timing'))))
+        return samples
+
+    def measure(self, steps):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            runs = list(pool.map(
+                lambda number: self.run_scenario(number, steps),
+                range(self.requests_count)
+            ))
+        wall = time.perf_counter() - started
+        results = {}
+        for index, (method, path, _) in enumerate(steps):
+            samples = [run[index] for run in runs]
+            latencies = [elapsed for _, _, elapsed, _ in samples]
+            queries = [timing['queries'] for *_, timing in samples
+                       if 'queries' in timing]
+            db_time = [timing['db'] for *_, timing in samples
+                       if 'db' in timing]
+            results[method] = {
+                'path': path,
+                'count': len(samples),
+                'errors': sum(status >= 400 for _, status, _, _ in samples),
+                'p50_ms': percentile(latencies, 0.5),
+                'p95_ms': percentile(latencies, 0.95),
+                'p99_ms': percentile(latencies, 0.99),
+                'mean_ms': sum(latencies) / len(latencies),
+                'rps': len(samples) / wall,
+                'queries': (sum(queries) / len(queries)
+                            if queries else None),
+                'db_ms': sum(db_time) / len(db_time) if db_time else None,
+            }
+        return results
+
+    def get_json(self, path):
+        response, _ = self.request('GET', path)
+        response.raise_for_status()
+        return response.json()
+
+    def load_context(self, prefix):
+        """Данные для сценариев, полученные через API."""
+        me = self.get_json('/api/users/me/')
+        recipes = self.get_json('/api/recipes/?limit=100')['results']
+        users = self.get_json('/api/users/?limit=100')['results']
+        tags = self.get_json('/api/tags/')
+        ingredients = self.get_json(f'/api/ingredients/?name={prefix}')
+        # Рецепты и авторы без связей с пользователем: парные сценарии
+        # записи возвращают данные в исходное состояние.
+        free_recipes = [
+            recipe['id'] for recipe in recipes
+            if not recipe['is_favorited'] and not recipe['is_in_shopping_cart']
+        ]
+        authors = [user['id'] for user in users
+                   if not user['is_subscribed'] and user['id'] != me['id']]
+        if not free_recipes or not authors or not tags or not ingredients:
+            raise ValueError('недостаточно данных, запустите seed_benchmark')
+        self.context = {
+            'recipes': free_recipes, 'authors': authors,
+            'tag_ids': [tag['id'] for tag in tags[:2]],
+            'tag_slugs': [tag['slug'] for tag in tags[:2]],
+            'ingredient_ids': [item['id'] for item in ingredients[:3]],
+            'prefix': prefix, 'image': make_image(),
+        }
+        return self.context
+
+    def run(self, scenarios, progress=None):
+        results = {}
+        for name, steps in scenarios.items():
+            for method, stats in self.measure(steps).items():
+                key = name if len(steps) == 1 else f'{name}:{method}'
+                results[key] = stats
+                if progress is not None:
+                    progress(key, stats)
+        return results
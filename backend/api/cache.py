@@ -0,0 +1,103 @@
+"""
+Модуль версионного кэша ответов API.
+
+Каждой модели соответствует счетчик поколений в кэше. Ключ ответа
+включает путь, нормализованную строку запроса и текущие поколения
+моделей, от которых зависит ответ. Изменение модели увеличивает счетчик,
+после чего старые ключи перестают использоваться и вытесняются по TTL.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+GENERATION_PREFIX = 'api:generation:'
+RESPONSE_PREFIX = 'api:response:'
+STATS_PREFIX = 'api:stats:'
+
+# Бэкенды, данные которых не видны другим процессам.
+LOCAL_BACKENDS = (DummyCache, LocMemCache)
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def is_process_local():
+    """Данные кэша видны только текущему процессу."""
+    return isinstance(get_cache(), LOCAL_BACKENDS)
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def user_label(user_id):
+    """Метка данных пользователя: избранное, корзина, подписки."""
+    return f'user:{user_id}'
+
+
+def get_generations(labels):
+    """Текущие поколения для списка меток моделей."""
+    cache = get_cache()
+    keys = [GENERATION_PREFIX + label for label in labels]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Начальное значение от времени: если счетчик был вытеснен,
+            # новое поколение не совпадет ни с одним из прежних.
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(*labels):
+    """Увеличивает поколения указанных моделей, возвращает новые."""
+    cache = get_cache()
+    generations = []
+    for label in labels:
+        key = GENERATION_PREFIX + label
+        try:
+            generations.append(cache.incr(key))
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+            generations.append(cache.get(key))
+    return generations
+
+
+def record(event):
+    """Увеличивает счетчик события кэша (hit, miss)."""
+    cache = get_cache()
+    key = STATS_PREFIX + event
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_stats(events=('hit', 'miss')):
+    cache = get_cache()
+    values = cache.get_many([STATS_PREFIX + event for event in events])
+    return {event: values.get(STATS_PREFIX + event, 0) for event in events}
+
+
+def reset_stats(events=('hit', 'miss')):
+    get_cache().delete_many([STATS_PREFIX + event for event in events])
+
+
+def response_cache_key(request, labels):
+    """Ключ ответа: хост, путь, строка запроса и поколения моделей."""
+    query = sorted(
+        (key, sorted(values))
+        for key, values in request.query_params.lists()
+    )
+    source = '|'.join((
+        request.get_host(),
+        request.path,
+        repr(query),
+        repr(get_generations(labels)),
+    ))
+    return RESPONSE_PREFIX + hashlib.md5(source.encode()).hexdigest()
@@ -1,5 +1,8 @@
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
-from recipes.models import Recipe, Tag
+from recipes.catalogs import tag_slugs
+from recipes.models import Recipe
+from recipes.search import search_recipes
 
 
 class RecipeFilter(FilterSet):
@@ -15,9 +18,26 @@ class RecipeFilter(FilterSet):
     author = filters.NumberFilter(field_name='author__id')
 
     # Показывать рецепты только с указанными тегами (по slug)
-    tags = filters.ModelMultipleChoiceFilter(field_name='tags__slug',
-                                             to_field_name='slug',
-                                             queryset=Tag.objects.all())
+    # Допустимые slug берутся из справочника в памяти процесса.
+    # FilterSet копирует фильтры через deepcopy, поэтому передается
+    # функция, а не связанный метод справочника с его блокировкой.
+    tags = filters.MultipleChoiceFilter(choices=lambda: tag_slugs.choices(),
+                                        method='tags_filter')
+
+    # Полусоединение с таблицей связи: без дублей и без DISTINCT
+    def tags_filter(self, queryset, name, value):
+        return queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe_id=OuterRef('pk'),
+                tag_id__in=tag_slugs.ids(value)
+            )
+        ))
+
+    # Полнотекстовый поиск по названию, ингредиентам и описанию
+    search = filters.CharFilter(method='search_filter')
+
+    def search_filter(self, queryset, name, value):
+        return search_recipes(queryset, value)
 
     # Метод для определения вхождения в список избранного
     def is_favorited_filter(self, queryset, name, value):
@@ -0,0 +1,82 @@
+"""Команда нагрузочного тестирования эндпоинтов API."""
+import json
+import time
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from api.benchmark import Benchmark, get_scenarios
+from recipes.seeding import PASSWORD, PREFIX
+
+
+class Command(BaseCommand):
+    help = ('Нагружает эндпоинты запущенного сервера и выводит задержки '
+            'p50/p95/p99, пропускную способность и число SQL запросов '
+            'в формате JSON для каждого уровня конкурентности.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000')
+        parser.add_argument('--label', default='',
+                            help='Метка прогона, например хэш коммита.')
+        parser.add_argument('--email', default=f'{PREFIX}0@example.com')
+        parser.add_argument('--password', default=PASSWORD)
+        parser.add_argument('--concurrency', type=int, nargs='+',
+                            default=[8],
+                            help='Уровни конкурентности; несколько '
+                                 'значений дают кривую пропускной '
+                                 'способности сервера.')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Проходов каждого сценария.')
+        parser.add_argument('--prefix', default='сах',
+                            help='Префикс для поиска ингредиентов.')
+        parser.add_argument('--only', nargs='*',
+                            help='Запустить только указанные сценарии.')
+        parser.add_argument('--output', help='Файл для результата.')
+
+    def login(self, base_url, email, password):
+        response = requests.post(
+            base_url.rstrip('/') + '/api/auth/token/login/',
+            json={'email': email, 'password': password}, timeout=30
+        )
+        if response.status_code != 200:
+            raise CommandError(f'Не удалось войти: {response.text}')
+        return response.json()['auth_token']
+
+    def progress(self, name, stats):
+        self.stderr.write(f'{name}: p95 {stats["p95_ms"]:.1f} мс, '
+                          f'{stats["rps"]:.1f} проходов/с')
+
+    def handle(self, *args, **options):
+        token = self.login(options['base_url'], options['email'],
+                           options['password'])
+        benchmark = Benchmark(options['base_url'], token,
+                              requests_count=options['requests'])
+        try:
+            context = benchmark.load_context(options['prefix'])
+        except (requests.RequestException, ValueError) as error:
+            raise CommandError(f'Не удалось подготовить данные: {error}')
+        scenarios = get_scenarios(context)
+        if options['only']:
+            unknown = set(options['only']) - set(scenarios)
+            if unknown:
+                raise CommandError(f'Неизвестные сценарии: {unknown}')
+            scenarios = {name: scenarios[name] for name in options['only']}
+        results = {}
+        for concurrency in options['concurrency']:
+            self.stderr.write(f'Конкурентность {concurrency}')
+            benchmark.concurrency = concurrency
+            results[str(concurrency)] = benchmark.run(
+                scenarios, progress=self.progress
+            )
+        report = json.dumps({
+            'label': options['label'],
+            'base_url': options['base_url'],
+            'concurrency': options['concurrency'],
+            'requests': options['requests'],
+            'finished': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results,
+        }, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report)
+        else:
+            self.stdout.write(report)
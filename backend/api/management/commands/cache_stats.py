@@ -0,0 +1,41 @@
+"""Команда просмотра статистики кэша ответов API."""
+from django.core.management.base import BaseCommand, CommandError
+from api.cache import get_stats, is_process_local, reset_stats
+
+EVENTS = {
+    'Ответы API': ('hit', 'miss'),
+    'Токены': ('auth_hit', 'auth_miss'),
+}
+
+
+class Command(BaseCommand):
+    help = ('Показывает количество попаданий и промахов кэша ответов API '
+            'и кэша токенов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить счетчики после вывода.'
+        )
+
+    def show(self, title, events):
+        stats = get_stats(events)
+        hits, misses = (stats[event] for event in events)
+        total = hits + misses
+        ratio = hits / total if total else 0
+        self.stdout.write(
+            f'{title}: попаданий: {hits}, промахов: {misses}, '
+            f'доля попаданий: {ratio:.1%}'
+        )
+
+    def handle(self, *args, **options):
+        # Счетчики сервера в памяти его процессов команде не видны.
+        if is_process_local():
+            raise CommandError(
+                'Счетчики хранятся в памяти процессов сервера. Задайте '
+                'общий бэкенд кэша: CACHE_BACKEND=file или redis.'
+            )
+        for title, events in EVENTS.items():
+            self.show(title, events)
+            if options['reset']:
+                reset_stats(events)
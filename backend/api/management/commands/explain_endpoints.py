@@ -0,0 +1,188 @@
+"""
+Команда сбора планов выполнения запросов эндпоинтов API.
+
+Вызываются все сценарии нагрузочного теста (api.benchmark) тестовым
+клиентом, каждый в транзакции, которая затем откатывается, поэтому
+сценарии записи не меняют данные. SELECT повторяются с EXPLAIN (ANALYZE,
+BUFFERS), изменяющие запросы - с EXPLAIN без выполнения. Планы
+сохраняются в файлы <output>/<label>/<сценарий>.txt для сравнения до
+и после изменений.
+"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+from api.benchmark import get_scenarios, make_image
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingList, Tag
+from users.models import FoodgramUser, Subscription
+
+# Кэш ответов отключается, чтобы каждый вызов доходил до базы.
+NO_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+# Индексы миграции recipes/0008_index_pack.
+INDEX_PACK = (
+    'recipe_author_pub_date_idx',
+    'ingredient_recipe_covering_idx',
+    'recipe_tags_tag_recipe_idx',
+    'ingredient_name_trgm_idx',
+)
+ANALYZED = ('SELECT', 'WITH')
+PLANNED = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def load_context(user, prefix):
+    """Данные для сценариев, как в Benchmark.load_context, из базы."""
+    linked = set(Favorite.objects.filter(user=user).values_list(
+        'recipe_id', flat=True
+    )) | set(ShoppingList.objects.filter(user=user).values_list(
+        'recipe_id', flat=True
+    ))
+    recipes = [pk for pk in Recipe.objects.order_by('-pub_date', '-id')
+               .values_list('id', flat=True)[:100] if pk not in linked]
+    authors = list(FoodgramUser.objects.exclude(pk=user.pk).exclude(
+        pk__in=Subscription.objects.filter(user=user).values('author')
+    ).order_by('id').values_list('id', flat=True)[:100])
+    tags = list(Tag.objects.order_by('id').values_list('id', 'slug')[:2])
+    ingredients = list(Ingredient.objects.filter(
+        name__istartswith=prefix
+    ).order_by('name').values_list('id', flat=True)[:3])
+    if not recipes or not authors or not tags or not ingredients:
+        raise CommandError('Недостаточно данных, запустите seed_benchmark.')
+    return {
+        'recipes': recipes, 'authors': authors,
+        'tag_ids': [pk for pk, _ in tags],
+        'tag_slugs': [slug for _, slug in tags],
+        'ingredient_ids': ingredients,
+        'prefix': prefix, 'image': make_image(),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Сохраняет EXPLAIN запросов всех сценариев нагрузочного '
+            'теста эндпоинтов API.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('label', help='Метка замера, например before.')
+        parser.add_argument(
+            '--output', default=os.path.join(settings.BASE_DIR, 'explain'),
+            help='Каталог для сохранения планов.'
+        )
+        parser.add_argument(
+            '--email', help='Пользователь, от имени которого идут запросы. '
+                            'По умолчанию - автор с наибольшим числом '
+                            'рецептов.'
+        )
+        parser.add_argument(
+            '--prefix', default='сах',
+            help='Префикс для поиска ингредиентов.'
+        )
+        parser.add_argument('--only', nargs='*',
+                            help='Снять планы только указанных сценариев.')
+        parser.add_argument(
+            '--without-indexes', action='store_true',
+            help='Удалить на время замера индексы recipes/0008_index_pack '
+                 '(удаление откатывается вместе с транзакцией).'
+        )
+
+    def get_user(self, email):
+        if email:
+            try:
+                return FoodgramUser.objects.get(email=email)
+            except FoodgramUser.DoesNotExist:
+                raise CommandError(f'Пользователь {email} не найден.')
+        user = FoodgramUser.objects.annotate(
+            total=Count('recipes')
+        ).order_by('-total').first()
+        if user is None:
+            raise CommandError('В базе нет пользователей.')
+        return user
+
+    def explain(self, queries):
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query['sql']
+                statement = sql.lstrip().split(None, 1)[0].upper()
+                if statement in ANALYZED:
+                    explain = 'EXPLAIN (ANALYZE, BUFFERS) '
+                elif statement in PLANNED:
+                    # ANALYZE выполнил бы изменение повторно.
+                    explain = 'EXPLAIN '
+                else:
+                    continue
+                try:
+                    with transaction.atomic():
+                        cursor.execute(explain + sql)
+                        plan = '\n'.join(row[0] for row in cursor.fetchall())
+                except DatabaseError as error:
+                    plan = f'-- ошибка EXPLAIN: {error}'
+                plans.append(f'-- {query["time"]} c\n{sql}\n\n{plan}\n')
+        return plans
+
+    def run_scenario(self, client, steps, values):
+        """Шаги сценария: заголовок и планы запросов каждого шага."""
+        sections = []
+        for method, path, body in steps:
+            url = path.format(**values)
+            with CaptureQueriesContext(connection) as context:
+                response = getattr(client, method.lower())(
+                    url, body, format='json'
+                )
+                # Потоковые ответы выполняют запросы при чтении.
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            if path == '/api/recipes/' and response.status_code == 201:
+                values['id'] = response.data['id']
+            sections.append((
+                f'{method} {url} -> {response.status_code}, '
+                f'запросов {len(context.captured_queries)}',
+                self.explain(context.captured_queries)
+            ))
+        return sections
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Команда работает только с PostgreSQL.')
+        if settings.ASYNC_VIEWS:
+            # Асинхронные обертки работают в других соединениях.
+            raise CommandError('Запустите команду с FOODGRAM_SERVER=wsgi.')
+        user = self.get_user(options['email'])
+        context = load_context(user, options['prefix'])
+        scenarios = get_scenarios(context)
+        if options['only']:
+            unknown = set(options['only']) - set(scenarios)
+            if unknown:
+                raise CommandError(f'Неизвестные сценарии: {unknown}')
+            scenarios = {name: scenarios[name] for name in options['only']}
+        directory = os.path.join(options['output'], options['label'])
+        os.makedirs(directory, exist_ok=True)
+        client = APIClient(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        client.force_authenticate(user)
+        with override_settings(CACHES=NO_CACHE, API_CACHE_ALIAS='default'), \
+                transaction.atomic():
+            if options['without_indexes']:
+                with connection.cursor() as cursor:
+                    for name in INDEX_PACK:
+                        cursor.execute(f'DROP INDEX IF EXISTS {name}')
+            for name, steps in scenarios.items():
+                values = {'recipe': context['recipes'][0],
+                          'author': context['authors'][0], 'id': 0}
+                with transaction.atomic():
+                    sections = self.run_scenario(client, steps, values)
+                    transaction.set_rollback(True)
+                path = os.path.join(directory, f'{name}.txt')
+                with open(path, 'w', encoding='utf-8') as file:
+                    for title, plans in sections:
+                        file.write(f'{title}\n\n')
+                        file.write('\n'.join(plans))
+                        file.write('\n')
+                self.stdout.write(f'{name}: ' + '; '.join(
+                    title for title, _ in sections
+                ))
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS(f'Планы сохранены в {directory}'))
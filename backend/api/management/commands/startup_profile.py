@@ -0,0 +1,116 @@
+"""Команда профилирования времени запуска приложения."""
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Запуск воркера: импорт приложения и, при предзагрузке, прогрев.
+BOOT = '''
+import json, os, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+started = time.perf_counter()
+from foodgram.{server} import application
+result = {{'load_ms': (time.perf_counter() - started) * 1000}}
+if {warmup}:
+    from foodgram.warmup import warmup
+    result['warmup_ms'] = warmup()
+print(json.dumps(result))
+'''
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(output):
+    """Строки -X importtime: модуль, собственное и общее время (мкс)."""
+    modules = []
+    for line in output.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            modules.append({
+                'module': name,
+                'self_us': int(own),
+                'cumulative_us': int(cumulative),
+                'depth': (len(indent) - 1) // 2,
+            })
+    return modules
+
+
+class Command(BaseCommand):
+    help = ('Запускает приложение в отдельном процессе с python -X '
+            'importtime и показывает время импорта модулей и пакетов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', choices=('wsgi', 'asgi'),
+                            default='wsgi')
+        parser.add_argument('--warmup', action='store_true',
+                            help='Выполнить прогрев, как мастер gunicorn '
+                                 'при предзагрузке.')
+        parser.add_argument('--sort', choices=('self', 'cumulative'),
+                            default='cumulative')
+        parser.add_argument('--limit', type=int, default=30)
+        parser.add_argument('--json', action='store_true',
+                            help='Вывести результат в формате JSON.')
+
+    def run_boot(self, server, warmup):
+        env = dict(os.environ)
+        if warmup:
+            env['FOODGRAM_PRELOAD'] = '1'
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             BOOT.format(server=server, warmup=warmup)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        if process.returncode:
+            raise CommandError(process.stderr[-2000:])
+        return json.loads(process.stdout.strip().splitlines()[-1]), (
+            parse_importtime(process.stderr)
+        )
+
+    def handle(self, *args, **options):
+        boot, modules = self.run_boot(options['server'], options['warmup'])
+        packages = Counter()
+        for module in modules:
+            packages[module['module'].split('.')[0]] += module['self_us']
+        key = f'{options["sort"]}_us'
+        report = {
+            'server': options['server'],
+            'modules_count': len(modules),
+            'imports_ms': sum(item['self_us'] for item in modules) / 1000,
+            **boot,
+            'packages': [
+                {'package': name, 'self_ms': value / 1000}
+                for name, value in packages.most_common(options['limit'])
+            ],
+            'modules': sorted(modules, key=lambda item: item[key],
+                              reverse=True)[:options['limit']],
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False,
+                                         indent=2))
+        else:
+            self.show(report)
+
+    def show(self, report):
+        self.stdout.write(
+            f'Модулей: {report["modules_count"]}, импорт: '
+            f'{report["imports_ms"]:.1f} мс, загрузка приложения: '
+            f'{report["load_ms"]:.1f} мс'
+        )
+        for step, value in report.get('warmup_ms', {}).items():
+            self.stdout.write(f'  прогрев {step}: {value:.1f} мс')
+        self.stdout.write('Пакеты (собственное время):')
+        for item in report['packages']:
+            self.stdout.write(f'  {item["self_ms"]:9.1f} мс  '
+                              f'{item["package"]}')
+        self.stdout.write('Модули (собственное / общее время):')
+        for item in report['modules']:
+            self.stdout.write(
+                f'  {item["self_us"] / 1000:9.1f} '
+                f'{item["cumulative_us"] / 1000:9.1f} мс  {item["module"]}'
+            )
@@ -0,0 +1,106 @@
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import (get_cache, get_generations, model_label, record,
+                    response_cache_key, user_label)
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET-запросы для list и retrieve.
+
+    Валидаторы вычисляются до сериализации: при совпадении с
+    If-None-Match или If-Modified-Since сразу возвращается 304.
+    По умолчанию ETag строится по поколениям cache_models.
+    """
+    cache_models = ()
+
+    def get_validators(self, request):
+        """Пара (etag, last_modified); last_modified - метка времени."""
+        generations = get_generations(
+            [model_label(model) for model in self.cache_models]
+        )
+        return make_etag(request.accepted_renderer.format, generations), None
+
+    def get_user_generation(self, request):
+        if not request.user.is_authenticated:
+            return None
+        return get_generations([user_label(request.user.id)])[0]
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            if etag is not None:
+                response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class CachedResponseMixin:
+    """
+    Кэширование ответов list и retrieve.
+
+    cache_models - модели, изменение которых делает ответ устаревшим;
+    cache_anonymous_only - кэшировать только ответы анонимам, если
+    содержимое зависит от пользователя.
+    """
+    cache_models = ()
+    cache_anonymous_only = False
+
+    def is_response_cacheable(self, request):
+        return (not self.cache_anonymous_only
+                or not request.user.is_authenticated)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not self.is_response_cacheable(request):
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = response_cache_key(
+            request, [model_label(model) for model in self.cache_models]
+        )
+        data = cache.get(key)
+        if data is not None:
+            record('hit')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        record('miss')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -1,6 +1,35 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class FoodgramPaginator(PageNumberPagination):
     page_size_query_param = 'limit'
     page_size = 6
+
+
+class FoodgramCursorPaginator(CursorPagination):
+    """Курсорная пагинация ленты рецептов по (pub_date, id)."""
+    page_size_query_param = 'limit'
+    page_size = 6
+    ordering = ('-pub_date', '-id')
+
+
+class RecipePaginator(FoodgramPaginator):
+    """
+    Пагинация рецептов: по номеру страницы или, если в запросе передан
+    параметр cursor (в том числе пустой), по курсору без COUNT(*) и OFFSET.
+    """
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = FoodgramCursorPaginator()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,18 +1,22 @@
 """Модуль сериалайзер приложения Api."""
 import base64
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
-from django.db import transaction
 from django.shortcuts import get_object_or_404
 from djoser.serializers import (UserCreateSerializer, UserSerializer)
-from rest_framework.serializers import (ModelSerializer, ImageField,
+from rest_framework.serializers import (ModelSerializer, Serializer,
+                                        FloatField, ImageField, ListField,
                                         ReadOnlyField, IntegerField,
                                         SerializerMethodField,
                                         PrimaryKeyRelatedField,
                                         ValidationError)
+from recipes.cart import rebuild_recipe_carts
+from recipes.images import is_processed, variant_name
 from recipes.models import (Tag, Ingredient, Recipe, IngredientInRecipe,
-                            Favorite, ShoppingList)
+                            Favorite, ShoppingList, CartTotal)
+from recipes.signals import on_commit_for_recipes, recipe_batches
 from users.models import Subscription, FoodgramUser
 
 User = get_user_model()
@@ -29,6 +33,49 @@ class Base64ImageField(ImageField):
         return super().to_internal_value(data)
 
 
+class ImageVariantField(ReadOnlyField):
+    """
+    Ссылка на уменьшенный вариант изображения рецепта.
+
+    Без указания variant выбирается по действию: карточка для списков,
+    крупный вариант для страницы рецепта. Для изображений, загруженных
+    до появления вариантов, отдается оригинал, а при сборке Pillow без
+    WebP вместо него - JPEG.
+    """
+
+    def __init__(self, variant=None, ext='jpg', **kwargs):
+        self.variant = variant
+        self.ext = ext
+        super().__init__(**kwargs)
+
+    def bind(self, field_name, parent):
+        # Все варианты строятся из поля image модели; для поля с тем же
+        # именем DRF запрещает явно указывать source.
+        if self.source is None and field_name != 'image':
+            self.source = 'image'
+        super().bind(field_name, parent)
+
+    def get_variant(self):
+        if self.variant is not None:
+            return self.variant
+        view = self.context.get('view')
+        if view is not None and getattr(view, 'action', None) == 'list':
+            return 'card'
+        return 'detail'
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        name = value.name
+        if is_processed(name):
+            name = variant_name(name, self.get_variant(), self.ext)
+        url = value.storage.url(name)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
 class TagSerializer(ModelSerializer):
     """Cериализатор тегов."""
 
@@ -70,6 +117,33 @@ class IngredientInRecipeCreateSerializer(ModelSerializer):
                   'amount')
 
 
+def subscribed_ids(request):
+    """
+    Id авторов, на которых подписан пользователь запроса.
+
+    Загружаются одним запросом и сохраняются в запросе: все сериализаторы
+    пользователей одного ответа используют общее множество.
+    """
+    if request is None or not request.user.is_authenticated:
+        return frozenset()
+    ids = getattr(request, '_subscribed_ids', None)
+    if ids is None:
+        ids = frozenset(Subscription.objects.filter(
+            user=request.user
+        ).values_list('author_id', flat=True))
+        request._subscribed_ids = ids
+    return ids
+
+
+def recipes_limit(request):
+    """Число превью рецептов из параметра recipes_limit или None."""
+    try:
+        limit = int(request.query_params['recipes_limit'])
+    except (KeyError, ValueError):
+        return None
+    return max(limit, 0)
+
+
 class FoodgramUserSerializer(UserSerializer):
     """Cериализатор пользователей Foodgram."""
     is_subscribed = SerializerMethodField(read_only=True)
@@ -86,14 +160,13 @@ class FoodgramUserSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        requests = self.context.get('request')
-        if requests is None:
+        # Признак может быть заранее аннотирован в запросе.
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        request = self.context.get('request')
+        if request is None or request.user.id == obj.id:
             return False
-        return (requests.user.is_authenticated
-                and Subscription.objects.filter(
-                    user__id=self.context['request'].user.id,
-                    author__id=obj.id
-                ).exists())
+        return obj.id in subscribed_ids(request)
 
 
 class FoodgramUserCreateSerializer(UserCreateSerializer):
@@ -111,12 +184,15 @@ class FoodgramUserCreateSerializer(UserCreateSerializer):
 
 class SimpleRecipeSerializer(ModelSerializer):
     """Упрощенный сериализатор рецептов."""
+    image = ImageVariantField('card')
+    image_webp = ImageVariantField('card', 'webp')
 
     class Meta:
         model = Recipe
         fields = ('id',
                   'name',
                   'image',
+                  'image_webp',
                   'cooking_time')
 
 
@@ -133,13 +209,23 @@ class RecipeReadSerializer(ModelSerializer):
     is_in_shopping_cart = SerializerMethodField(
         method_name='get_is_in_shopping_cart'
     )
+    image = ImageVariantField()
+    image_webp = ImageVariantField(ext='webp')
+
+    def to_representation(self, instance):
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
 
     def get_ingredients(self, obj):
-        ingredients = IngredientInRecipe.objects.filter(recipe=obj)
+        # Использует prefetch из RecipeQuerySet.with_related(), если он есть.
+        ingredients = obj.ingredients_in_recipes.all()
         serializer = IngredientInRecipeSerializer(ingredients, many=True)
         return serializer.data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         requests = self.context.get('request')
         if requests is None:
             return False
@@ -149,6 +235,8 @@ class RecipeReadSerializer(ModelSerializer):
                 )
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         requests = self.context.get('request')
         if requests is None:
             return False
@@ -167,8 +255,11 @@ class RecipeReadSerializer(ModelSerializer):
                   'is_in_shopping_cart',
                   'name',
                   'image',
+                  'image_webp',
                   'text',
-                  'cooking_time')
+                  'cooking_time',
+                  'favorites_count',
+                  'in_carts_count')
 
 
 class RecipeChangeSerializer(ModelSerializer):
@@ -214,41 +305,86 @@ class RecipeChangeSerializer(ModelSerializer):
             raise ValidationError(
                 'Ингредиенты должны быть уникальны.'
             )
+        # Все ингредиенты проверяются одним запросом.
+        found = Ingredient.objects.in_bulk(unique_ingredient_id_list)
+        missing = sorted(unique_ingredient_id_list - found.keys())
+        if missing:
+            raise ValidationError(
+                f'Ингредиенты не найдены: {missing}.'
+            )
         return obj
 
-    @transaction.atomic
-    def tags_and_ingredients_set(self, recipe, tags, ingredients):
-        recipe.tags.set(tags)
-        IngredientInRecipe.objects.bulk_create(
-            [IngredientInRecipe(
-                recipe=recipe,
-                ingredient=get_object_or_404(Ingredient, pk=ingredient['id']),
-                amount=ingredient['amount']
-            ) for ingredient in ingredients]
-        )
-
-    @transaction.atomic
+    def set_tags(self, recipe, tags):
+        """Обновляет теги, только если их набор изменился."""
+        current = {tag.id for tag in recipe.tags.all()}
+        new = {tag.id for tag in tags}
+        if current - new:
+            recipe.tags.remove(*(current - new))
+        if new - current:
+            recipe.tags.add(*(new - current))
+
+    def set_ingredients(self, recipe, ingredients):
+        """Применяет к ингредиентам рецепта только разницу."""
+        current = {item.ingredient_id: item
+                   for item in recipe.ingredients_in_recipes.all()}
+        new = {item['id']: item['amount'] for item in ingredients}
+        removed = current.keys() - new.keys()
+        added = [
+            IngredientInRecipe(recipe=recipe, ingredient_id=pk, amount=amount)
+            for pk, amount in new.items() if pk not in current
+        ]
+        changed = []
+        for pk, amount in new.items():
+            if pk in current and current[pk].amount != amount:
+                current[pk].amount = amount
+                changed.append(current[pk])
+        if removed:
+            IngredientInRecipe.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        if added:
+            IngredientInRecipe.objects.bulk_create(added)
+        if changed:
+            IngredientInRecipe.objects.bulk_update(changed, ['amount'])
+        if added or changed:
+            # bulk_create и bulk_update не отправляют сигналов строк.
+            on_commit_for_recipes(rebuild_recipe_carts, [recipe.id])
+
+    @recipe_batches()
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(author=self.context['request'].user,
                                        **validated_data)
-        self.tags_and_ingredients_set(recipe, tags, ingredients)
+        Recipe.tags.through.objects.bulk_create(
+            [Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+             for tag in tags]
+        )
+        IngredientInRecipe.objects.bulk_create(
+            [IngredientInRecipe(recipe=recipe,
+                                ingredient_id=ingredient['id'],
+                                amount=ingredient['amount'])
+             for ingredient in ingredients]
+        )
         return recipe
 
-    @transaction.atomic
+    @recipe_batches()
     def update(self, instance, validated_data):
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredients')
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
         super().update(instance, validated_data)
-        IngredientInRecipe.objects.filter(
-            recipe=instance,
-            ingredient__in=instance.ingredients.all()).delete()
-        self.tags_and_ingredients_set(instance, tags, ingredients)
-        instance.save()
+        if tags is not None:
+            self.set_tags(instance, tags)
+        if ingredients is not None:
+            self.set_ingredients(instance, ingredients)
         return instance
 
     def to_representation(self, instance):
+        # Повторное чтение с prefetch: число запросов не зависит от
+        # количества ингредиентов.
+        instance = Recipe.objects.with_related().with_user_flags(
+            self.context['request'].user
+        ).get(pk=instance.pk)
         return RecipeReadSerializer(instance,
                                     context=self.context).data
 
@@ -304,6 +440,44 @@ class ShoppingListSerializer(RecipesDataWorkerSerializer):
         ).data
 
 
+class RecipeIdsSerializer(Serializer):
+    """Сериализатор списка рецептов для пакетных операций."""
+    recipes = ListField(child=IntegerField(min_value=1),
+                        allow_empty=False,
+                        max_length=settings.MAX_BATCH_RECIPES)
+
+    def validate_recipes(self, value):
+        # Повторы убираются с сохранением порядка.
+        return list(dict.fromkeys(value))
+
+
+class CookableQuerySerializer(Serializer):
+    """Параметры поиска рецептов по имеющимся ингредиентам."""
+    ingredients = ListField(child=IntegerField(min_value=1),
+                            allow_empty=False,
+                            max_length=settings.MAX_COOKABLE_INGREDIENTS)
+    limit = IntegerField(min_value=1, max_value=settings.MAX_COOKABLE_LIMIT,
+                         default=20)
+
+
+class CookableRecipeSerializer(Serializer):
+    """Рецепт с долей имеющихся и списком недостающих ингредиентов."""
+    recipe = SimpleRecipeSerializer()
+    coverage = FloatField()
+    matched = IntegerField()
+    total = IntegerField()
+    missing = IngredientSerializer(many=True)
+
+
+class CartTotalSerializer(ModelSerializer):
+    """Сериализатор итогов списка покупок."""
+
+    class Meta:
+        model = CartTotal
+        fields = ('name', 'unit', 'amount')
+        extra_kwargs = {'amount': {'coerce_to_string': False}}
+
+
 class SubscriptionSerializer(ModelSerializer):
     """Cериализатор подписчиков Foodgram."""
     email = ReadOnlyField(source='author.email')
@@ -313,7 +487,7 @@ class SubscriptionSerializer(ModelSerializer):
     last_name = ReadOnlyField(source='author.last_name')
     is_subscribed = SerializerMethodField(read_only=True)
     recipes = SerializerMethodField(read_only=True)
-    recipes_count = SerializerMethodField(read_only=True)
+    recipes_count = ReadOnlyField(source='author.recipes_count')
 
     class Meta:
         model = Subscription
@@ -321,11 +495,8 @@ class SubscriptionSerializer(ModelSerializer):
                   'is_subscribed', 'recipes', 'recipes_count',)
 
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        condition_1 = self.context.get('request').user.is_authenticated
-        condition_2 = Subscription.objects.filter(user=user,
-                                                  author=obj.author).exists()
-        return condition_1 and condition_2
+        # Сериализатор описывает подписки самого пользователя.
+        return True
 
     def validate(self, data):
         request = self.context.get('request', None)
@@ -346,15 +517,14 @@ class SubscriptionSerializer(ModelSerializer):
         data = {'author': author, 'user': user}
         return data
 
-    def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj.author).count()
-
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        query_params = request.query_params
+        # Превью рецептов заранее загружено в SubscriptionsViewSet.
+        if hasattr(obj.author, 'recipes_preview'):
+            return SimpleRecipeSerializer(obj.author.recipes_preview,
+                                          many=True).data
         queryset = Recipe.objects.filter(author=obj.author)
-        if 'recipes_limit' in query_params:
-            recipes_limit = query_params['recipes_limit']
-            queryset = queryset[:int(recipes_limit)]
+        limit = recipes_limit(self.context.get('request'))
+        if limit is not None:
+            queryset = queryset[:limit]
         serializer = SimpleRecipeSerializer(queryset, many=True)
         return serializer.data
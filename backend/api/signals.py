@@ -0,0 +1,60 @@
+"""Модуль обработчиков сигналов приложения api."""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from rest_framework.authtoken.models import Token
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe,
+                            Recipe, ShoppingList, Tag)
+from users.models import FoodgramUser, Subscription
+from .authentication import auth_label, token_cache
+from .cache import bump_generation, model_label, user_label
+
+CACHED_MODELS = (Recipe, Tag, Ingredient, IngredientInRecipe, FoodgramUser)
+USER_DATA_MODELS = (Favorite, ShoppingList, Subscription)
+
+
+def bump_model_generation(sender, update_fields=None, **kwargs):
+    """Новое поколение кэша модели после фиксации изменений."""
+    # Вход пользователя обновляет только last_login.
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    label = model_label(sender)
+    transaction.on_commit(lambda: bump_generation(label))
+
+
+def bump_recipe_tags_generation(action, **kwargs):
+    if action.startswith('post_'):
+        label = model_label(Recipe)
+        transaction.on_commit(lambda: bump_generation(label))
+
+
+def bump_user_generation(instance, **kwargs):
+    """Новое поколение пользовательских данных для условных GET."""
+    label = user_label(instance.user_id)
+    transaction.on_commit(lambda: bump_generation(label))
+
+
+def invalidate_token(instance, **kwargs):
+    """Удаление токена, в том числе при выходе пользователя."""
+    label = auth_label(instance.user_id)
+    token_cache.invalidate(instance.key)
+    transaction.on_commit(lambda: bump_generation(label))
+
+
+def invalidate_user_tokens(instance, update_fields=None, **kwargs):
+    """Смена пароля, блокировка и другие изменения пользователя."""
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    label = auth_label(instance.pk)
+    token_cache.invalidate_user(instance.pk)
+    transaction.on_commit(lambda: bump_generation(label))
+
+
+for model in CACHED_MODELS:
+    post_save.connect(bump_model_generation, sender=model)
+    post_delete.connect(bump_model_generation, sender=model)
+for model in USER_DATA_MODELS:
+    post_save.connect(bump_user_generation, sender=model)
+    post_delete.connect(bump_user_generation, sender=model)
+m2m_changed.connect(bump_recipe_tags_generation, sender=Recipe.tags.through)
+post_delete.connect(invalidate_token, sender=Token)
+post_save.connect(invalidate_user_tokens, sender=FoodgramUser)
@@ -0,0 +1,85 @@
+"""Общие данные и настройки тестов API."""
+import base64
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.cache import caches
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APITestCase
+from api.authentication import token_cache
+from recipes.catalogs import ingredient_index, tag_slugs
+from recipes.cookable import recipe_ingredient_index
+from recipes.models import Ingredient, IngredientInRecipe, Recipe, Tag
+from users.models import FoodgramUser, Subscription
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(color='red'):
+    """Изображение PNG в кодировке Base64 для создания рецепта."""
+    buffer = BytesIO()
+    Image.new('RGB', (8, 8), color).save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class FoodgramAPITestCase(APITestCase):
+    """Пользователи, теги, ингредиенты и рецепты для тестов API."""
+    RECIPES = 10
+    INGREDIENTS = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = FoodgramUser.objects.create_user(
+            email='user@example.com', username='user', password='pass',
+            first_name='Иван', last_name='Иванов'
+        )
+        cls.author = FoodgramUser.objects.create_user(
+            email='author@example.com', username='author', password='pass',
+            first_name='Петр', last_name='Петров'
+        )
+        Subscription.objects.create(user=cls.user, author=cls.author)
+        cls.tags = [
+            Tag.objects.create(name=f'Тег {number}', color=f'#00000{number}',
+                               slug=f'tag{number}')
+            for number in range(3)
+        ]
+        names = [f'Ингредиент {number}' for number in range(cls.INGREDIENTS)]
+        Ingredient.objects.bulk_create([
+            Ingredient(name=name, measurement_unit='г') for name in names
+        ])
+        # Не все СУБД возвращают ключи из bulk_create.
+        found = {ingredient.name: ingredient for ingredient in
+                 Ingredient.objects.filter(name__in=names)}
+        cls.ingredients = [found[name] for name in names]
+        cls.recipes = []
+        for number in range(cls.RECIPES):
+            recipe = Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {number}',
+                text='Описание', cooking_time=10,
+                image='recipes/images/recipe.jpg'
+            )
+            recipe.tags.set(cls.tags[:2])
+            IngredientInRecipe.objects.bulk_create([
+                IngredientInRecipe(recipe=recipe, ingredient=ingredient,
+                                   amount=number + 1)
+                for ingredient in cls.ingredients[:5]
+            ])
+            cls.recipes.append(recipe)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Кэши процесса не должны переживать откат транзакции теста.
+        for cache in caches.all():
+            cache.clear()
+        token_cache.clear()
+        for catalog in (ingredient_index, tag_slugs,
+                        recipe_ingredient_index):
+            catalog.invalidate()
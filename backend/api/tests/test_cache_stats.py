@@ -0,0 +1,51 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.authtoken.models import Token
+
+from .base import FoodgramAPITestCase
+
+
+class CacheStatsTest(FoodgramAPITestCase):
+    """Команда cache_stats."""
+
+    def setUp(self):
+        super().setUp()
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        self.shared = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location,
+        }}
+
+    def test_process_local_backend(self):
+        with self.assertRaises(CommandError):
+            call_command('cache_stats', stdout=StringIO())
+
+    def test_responses(self):
+        with self.settings(CACHES=self.shared):
+            self.client.get('/api/tags/')
+            response = self.client.get('/api/tags/')
+            self.assertEqual(response['X-Cache'], 'HIT')
+            stdout = StringIO()
+            call_command('cache_stats', '--reset', stdout=stdout)
+            self.assertIn('Ответы API: попаданий: 1, промахов: 1',
+                          stdout.getvalue())
+            stdout = StringIO()
+            call_command('cache_stats', stdout=stdout)
+            self.assertIn('Ответы API: попаданий: 0, промахов: 0',
+                          stdout.getvalue())
+
+    def test_tokens(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        with self.settings(CACHES=self.shared):
+            for _ in range(3):
+                self.client.get('/api/users/me/')
+            stdout = StringIO()
+            call_command('cache_stats', stdout=stdout)
+        self.assertIn('Токены: попаданий: 2, промахов: 1',
+                      stdout.getvalue())
@@ -0,0 +1,57 @@
+from recipes.cart import rebuild_cart_totals, rebuild_recipe_carts
+from recipes.models import CartTotal, IngredientInRecipe, ShoppingList
+from .base import FoodgramAPITestCase
+
+
+class CartTotalsTest(FoodgramAPITestCase):
+    """Итоги списка покупок после изменения рецептов."""
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.recipes[0]
+        ShoppingList.objects.create(user=self.user, recipe=self.recipe)
+
+    def totals(self):
+        return dict(CartTotal.objects.filter(
+            user=self.user
+        ).values_list('name', 'amount'))
+
+    def patch(self, ingredients):
+        self.client.force_authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.patch(
+                f'/api/recipes/{self.recipe.id}/',
+                {'ingredients': [{'id': ingredient.id, 'amount': amount}
+                                 for ingredient, amount in ingredients],
+                 'tags': [tag.id for tag in self.tags[:2]]},
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        return [callback for callback in callbacks
+                if getattr(callback, 'action', None) is rebuild_recipe_carts]
+
+    def test_ingredients_changed(self):
+        IngredientInRecipe.objects.bulk_create([
+            IngredientInRecipe(recipe=self.recipe, ingredient=ingredient,
+                               amount=1)
+            for ingredient in self.ingredients[5:]
+        ])
+        rebuilds = self.patch([(self.ingredients[0], 7),
+                               (self.ingredients[19], 2)])
+        self.assertEqual(len(rebuilds), 1)
+        self.assertEqual(self.totals(), {'Ингредиент 0': 7,
+                                         'Ингредиент 19': 2})
+
+    def test_ingredients_unchanged(self):
+        rebuild_cart_totals([self.user.id])
+        totals = self.totals()
+        rebuilds = self.patch([(ingredient, 1)
+                               for ingredient in self.ingredients[:5]])
+        self.assertEqual(rebuilds, [])
+        self.assertEqual(self.totals(), totals)
+
+    def test_rebuild(self):
+        CartTotal.objects.filter(user=self.user).update(amount=100)
+        self.assertEqual(rebuild_cart_totals([self.user.id]), 5)
+        self.assertEqual(self.totals(), {f'Ингредиент {number}': 1
+                                         for number in range(5)})
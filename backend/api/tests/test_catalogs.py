@@ -0,0 +1,55 @@
+import time
+from unittest import mock
+
+from django.test import override_settings
+from api.cache import bump_generation, get_generations
+from foodgram import warmup
+from recipes.catalogs import ingredient_index, tag_slugs
+from recipes.models import Ingredient, Tag
+
+from .base import FoodgramAPITestCase
+
+
+class SharedCatalogTest(FoodgramAPITestCase):
+    """
+    Справочники перезагружаются после изменения в другом процессе.
+
+    Другой процесс моделируется записью без обработчиков on_commit
+    этого процесса и увеличением поколения справочника в общем кэше.
+    """
+
+    def test_tag_created_elsewhere(self):
+        self.assertEqual(
+            self.client.get('/api/recipes/?tags=tag0').status_code, 200
+        )
+        Tag.objects.create(name='Новый', color='#FFFFFF', slug='new')
+        self.assertEqual(
+            self.client.get('/api/recipes/?tags=new').status_code, 400
+        )
+        bump_generation(tag_slugs.label)
+        self.assertEqual(
+            self.client.get('/api/recipes/?tags=new').status_code, 200
+        )
+
+    def test_ingredient_created_elsewhere(self):
+        self.assertEqual(ingredient_index.search('соль'), [])
+        Ingredient.objects.create(name='Соль', measurement_unit='г')
+        self.assertEqual(ingredient_index.search('соль'), [])
+        bump_generation(ingredient_index.label)
+        self.assertEqual(
+            [item['name'] for item in ingredient_index.search('соль')],
+            ['Соль']
+        )
+
+    @override_settings(WARMUP_MAX_AGE=60)
+    def test_worker_started_late(self):
+        catalogs = warmup.get_catalogs()
+        for catalog in catalogs:
+            catalog.get_data()
+        labels = [catalog.label for catalog in catalogs]
+        generations = get_generations(labels)
+        with mock.patch.object(warmup, 'warmed_at', time.monotonic() - 61):
+            warmup.after_fork()
+        self.assertTrue(all(catalog._data is None for catalog in catalogs))
+        # Остальные процессы справочники не перезагружают.
+        self.assertEqual(get_generations(labels), generations)
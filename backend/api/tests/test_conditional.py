@@ -0,0 +1,44 @@
+from .base import FoodgramAPITestCase
+
+
+class RecipeListValidatorsTest(FoodgramAPITestCase):
+    """ETag списка рецептов строится по поколениям без запросов."""
+
+    path = '/api/recipes/?limit=5'
+
+    def test_cached_list(self):
+        self.client.get(self.path)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.path)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertNotIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.path, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes(self):
+        self.client.force_authenticate(self.user)
+        recipe = self.recipes[-1]
+        changes = (
+            ('post', f'/api/recipes/{recipe.id}/favorite/'),
+            ('post', f'/api/recipes/{recipe.id}/shopping_cart/'),
+        )
+        etag = self.client.get(self.path)['ETag']
+        for method, path in changes:
+            with self.subTest(path=path):
+                with self.captureOnCommitCallbacks(execute=True):
+                    getattr(self.client, method)(path)
+                response = self.client.get(self.path,
+                                           HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                etag = response['ETag']
+        # Удаление рецепта, которого нет на первой странице.
+        self.client.force_authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/recipes/{self.recipes[0].id}/')
+        self.client.force_authenticate(None)
+        response = self.client.get(self.path)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], self.RECIPES - 1)
@@ -0,0 +1,53 @@
+from api.cache import bump_generation
+from recipes.cookable import recipe_ingredient_index
+from recipes.models import IngredientInRecipe
+from recipes.signals import recipe_batches
+
+from .base import FoodgramAPITestCase
+
+
+class CookableIndexTest(FoodgramAPITestCase):
+    """Индекс ингредиентов рецептов после изменения рецептов."""
+
+    def cookable(self, ingredient):
+        response = self.client.get(
+            f'/api/recipes/cookable/?ingredients={ingredient.id}'
+        )
+        self.assertEqual(response.status_code, 200)
+        return {item['recipe']['id'] for item in response.data}
+
+    def test_refresh(self):
+        recipe = self.recipes[0]
+        self.assertEqual(self.cookable(self.ingredients[10]), set())
+        data = recipe_ingredient_index.get_data()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, \
+                recipe_batches():
+            IngredientInRecipe.objects.filter(recipe=recipe).delete()
+            IngredientInRecipe.objects.create(
+                recipe=recipe, ingredient=self.ingredients[10], amount=1
+            )
+            recipe.save()
+        refreshes = [callback for callback in callbacks
+                     if getattr(callback, 'action', None)
+                     == recipe_ingredient_index.refresh]
+        self.assertEqual(len(refreshes), 1)
+        self.assertEqual(self.cookable(self.ingredients[10]), {recipe.id})
+        self.assertNotIn(recipe.id, self.cookable(self.ingredients[0]))
+        # Изменение применено слоем поверх загруженного индекса.
+        self.assertIs(recipe_ingredient_index.get_data(), data)
+
+    def test_changed_elsewhere(self):
+        recipe = self.recipes[0]
+        self.assertEqual(self.cookable(self.ingredients[10]), set())
+        # Другой процесс: обработчики on_commit этого процесса не
+        # выполняются, меняется только поколение в общем кэше.
+        IngredientInRecipe.objects.create(
+            recipe=recipe, ingredient=self.ingredients[10], amount=1
+        )
+        bump_generation(recipe_ingredient_index.label)
+        self.assertEqual(self.cookable(self.ingredients[10]), {recipe.id})
+        # Если индекс менял и другой процесс, слой не применяется:
+        # индекс загружается заново при следующем обращении.
+        bump_generation(recipe_ingredient_index.label)
+        recipe_ingredient_index.refresh([recipe.id])
+        self.assertIsNone(recipe_ingredient_index._data)
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from api.views import ShoppingListViewSet
+from recipes.counters import (reconcile_recipe_counters,
+                              reconcile_recipes_count)
+from recipes.models import CartTotal, Favorite, Recipe
+from users.models import FoodgramUser
+
+from .base import FoodgramAPITestCase
+
+
+class RecipeCountersCacheTest(FoodgramAPITestCase):
+    """Кэшированные ответы после изменения счетчиков рецепта."""
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.recipes[0]
+        self.path = f'/api/recipes/{self.recipe.id}/'
+        self.client.get(self.path)
+        self.assertEqual(self.client.get(self.path)['X-Cache'], 'HIT')
+
+    def change(self, method, path, data=None):
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(path, data,
+                                                    format='json')
+        self.assertLess(response.status_code, 300)
+        self.client.force_authenticate(None)
+        return self.client.get(self.path)
+
+    def test_favorite(self):
+        response = self.change('post', f'{self.path}favorite/')
+        self.assertEqual(response.data['favorites_count'], 1)
+        response = self.change('delete', f'{self.path}favorite/')
+        self.assertEqual(response.data['favorites_count'], 0)
+
+    def test_batch(self):
+        data = {'recipes': [self.recipe.id, self.recipes[1].id]}
+        response = self.change('post', '/api/recipes/shopping_cart/', data)
+        self.assertEqual(response.data['in_carts_count'], 1)
+        self.assertTrue(CartTotal.objects.filter(user=self.user).exists())
+        response = self.change('delete', '/api/recipes/shopping_cart/',
+                               data)
+        self.assertEqual(response.data['in_carts_count'], 0)
+        self.assertFalse(CartTotal.objects.filter(user=self.user).exists())
+        self.assertFalse(Recipe.objects.filter(in_carts_count__gt=0))
+
+    def test_repeated_batch(self):
+        data = {'recipes': [self.recipe.id, self.recipes[1].id]}
+        self.change('post', '/api/recipes/shopping_cart/', data)
+        totals = CartTotal.objects.filter(user=self.user).order_by(
+            'name', 'unit'
+        ).values_list('name', 'unit', 'amount')
+        before = list(totals)
+        # Повтор пачки с устаревшей проверкой, как у параллельного запроса.
+        stale = {pk: False for pk in data['recipes']}
+        with mock.patch.object(
+            ShoppingListViewSet, 'get_linked_recipes',
+            return_value=(data['recipes'], stale)
+        ):
+            response = self.change('post', '/api/recipes/shopping_cart/',
+                                   data)
+        self.assertEqual(response.data['in_carts_count'], 1)
+        self.assertEqual(list(totals), before)
+        self.assertEqual(Recipe.objects.get(
+            pk=self.recipes[1].pk
+        ).in_carts_count, 1)
+
+
+class ReconcileCountersTest(FoodgramAPITestCase):
+    """Пересчет денормализованных счетчиков."""
+
+    def test_recipe_counters(self):
+        first, second = self.recipes[:2]
+        Favorite.objects.create(user=self.user, recipe=first)
+        Recipe.objects.filter(pk=first.pk).update(favorites_count=0)
+        Recipe.objects.filter(pk=second.pk).update(favorites_count=5,
+                                                   in_carts_count=2)
+        self.assertEqual(reconcile_recipe_counters([first.pk]), 1)
+        self.assertEqual(reconcile_recipe_counters(), 1)
+        self.assertEqual(reconcile_recipe_counters(), 0)
+        self.assertEqual(reconcile_recipe_counters([]), 0)
+        counters = dict(Recipe.objects.filter(
+            pk__in=(first.pk, second.pk)
+        ).values_list('pk', 'favorites_count'))
+        self.assertEqual(counters, {first.pk: 1, second.pk: 0})
+        self.assertFalse(Recipe.objects.filter(in_carts_count__gt=0))
+
+    def test_recipes_count(self):
+        FoodgramUser.objects.filter(
+            pk__in=(self.author.pk, self.user.pk)
+        ).update(recipes_count=3)
+        self.assertEqual(reconcile_recipes_count([self.author.pk]), 1)
+        self.assertEqual(reconcile_recipes_count(), 1)
+        self.author.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual(
+            (self.author.recipes_count, self.user.recipes_count),
+            (len(self.recipes), 0)
+        )
@@ -0,0 +1,34 @@
+import os
+import shutil
+import tempfile
+
+from django.db import transaction
+from recipes.csv_import import load_ingredients
+from recipes.models import Ingredient
+from .base import FoodgramAPITestCase
+
+
+class LoadIngredientsTest(FoodgramAPITestCase):
+    """Загрузка справочника ингредиентов."""
+
+    def write(self, name, rows):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.writelines(f'{row}\n' for row in rows)
+        return path
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_twice_in_transaction(self):
+        first = self.write('first.csv', ['Соль,г', 'Перец,г'])
+        second = self.write('second.csv', ['Сахар,г', 'Соль,г'])
+        with transaction.atomic():
+            self.assertEqual(load_ingredients(first)['true'], 2)
+            results = load_ingredients(second)
+        self.assertEqual((results['true'], results['dub']), (1, 1))
+        self.assertEqual(Ingredient.objects.filter(
+            name__in=('Соль', 'Перец', 'Сахар')
+        ).count(), 3)
@@ -0,0 +1,37 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from recipes.models import Favorite, Recipe
+
+from .base import FoodgramAPITestCase
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN только на PostgreSQL')
+class ExplainEndpointsTest(FoodgramAPITestCase):
+    """Команда explain_endpoints."""
+
+    def test_scenarios_rolled_back(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        recipes = Recipe.objects.count()
+        call_command('explain_endpoints', 'before', output=directory,
+                     prefix='Ингредиент', without_indexes=True,
+                     only=['favorite', 'recipe_write', 'users_list'],
+                     stdout=StringIO())
+        with open(os.path.join(directory, 'before', 'recipe_write.txt'),
+                  encoding='utf-8') as file:
+            plans = file.read()
+        for line in ('POST /api/recipes/ -> 201', '-> 200', '-> 204',
+                     'Execution Time'):
+            self.assertIn(line, plans)
+        self.assertEqual(sorted(os.listdir(os.path.join(directory,
+                                                        'before'))),
+                         ['favorite.txt', 'recipe_write.txt',
+                          'users_list.txt'])
+        self.assertEqual(Recipe.objects.count(), recipes)
+        self.assertFalse(Favorite.objects.exists())
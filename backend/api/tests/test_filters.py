@@ -0,0 +1,34 @@
+from recipes.models import Recipe, Tag
+
+from .base import FoodgramAPITestCase
+
+
+class RecipeTagFilterTest(FoodgramAPITestCase):
+    """Фильтрация рецептов по slug тегов."""
+
+    def test_filter_by_tags(self):
+        other = Recipe.objects.create(
+            author=self.user, name='Без тегов', text='Описание',
+            cooking_time=5, image='recipes/images/recipe.jpg'
+        )
+        other.tags.set([self.tags[2]])
+        response = self.client.get('/api/recipes/?tags=tag2&limit=100')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.data['results']],
+                         [other.id])
+        response = self.client.get(
+            '/api/recipes/?tags=tag0&tags=tag2&limit=100'
+        )
+        self.assertEqual(response.data['count'], self.RECIPES + 1)
+
+    def test_unknown_tag(self):
+        response = self.client.get('/api/recipes/?tags=missing')
+        self.assertEqual(response.status_code, 400)
+
+    def test_new_tag(self):
+        self.client.get('/api/recipes/?tags=tag0')
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Новый', color='#FFFFFF', slug='new')
+        response = self.client.get('/api/recipes/?tags=new')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
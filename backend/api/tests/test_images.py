@@ -0,0 +1,46 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+from PIL import Image
+from recipes.images import (FORMATS, VARIANTS, RecipeImageStorage,
+                            variant_name)
+
+
+def make_file(color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', (8, 8), color).save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue())
+
+
+class RecipeImageStorageTest(SimpleTestCase):
+    """Сохранение изображений рецептов и их вариантов."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.storage = RecipeImageStorage(location=directory)
+
+    def variants(self, name):
+        return [variant_name(name, variant, ext)
+                for variant in VARIANTS for ext in FORMATS]
+
+    def test_variants(self):
+        name = self.storage.save('recipes/images/image.png', make_file())
+        for variant in self.variants(name):
+            self.assertTrue(self.storage.exists(variant), variant)
+        # Без поддержки WebP ссылка ведет на JPEG.
+        if 'webp' not in FORMATS:
+            self.assertEqual(variant_name(name, 'card', 'webp'),
+                             variant_name(name, 'card'))
+
+    def test_missing_variants_restored(self):
+        name = self.storage.save('recipes/images/image.png', make_file())
+        missing = self.variants(name)[0]
+        self.storage.delete(missing)
+        self.assertEqual(
+            self.storage.save('recipes/images/copy.png', make_file()), name
+        )
+        self.assertTrue(self.storage.exists(missing))
@@ -0,0 +1,136 @@
+from django.core.cache import caches
+from django.db import connection
+from recipes.models import Favorite, ShoppingList
+
+from .base import FoodgramAPITestCase, make_image
+
+# COUNT(*) пагинатора, страница, prefetch тегов и ингредиентов.
+LIST_QUERIES = 4
+# Агрегат для ETag, рецепт, prefetch тегов и ингредиентов.
+DETAIL_QUERIES = 4
+# Запись вместе с обработчиками после фиксации: вектор поиска, индекс
+# ингредиентов и, если ингредиенты изменились, итоги корзин. Вектор
+# поиска обновляется только на PostgreSQL.
+SEARCH_QUERIES = int(connection.vendor == 'postgresql')
+POST_QUERIES = 13 + SEARCH_QUERIES
+PATCH_ADDED_QUERIES = 19 + SEARCH_QUERIES
+PATCH_REMOVED_QUERIES = 20 + SEARCH_QUERIES
+PATCH_UNCHANGED_QUERIES = 13 + SEARCH_QUERIES
+
+
+class RecipeReadQueriesTest(FoodgramAPITestCase):
+    """Число запросов чтения рецептов не зависит от размера страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for recipe in cls.recipes[::2]:
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+            ShoppingList.objects.create(user=cls.user, recipe=recipe)
+
+    def get(self, path):
+        # Ответ не должен браться из кэша предыдущего запроса.
+        caches['default'].clear()
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assert_list_queries(self):
+        for limit in (1, 5, self.RECIPES):
+            with self.subTest(limit=limit):
+                with self.assertNumQueries(LIST_QUERIES):
+                    response = self.get(f'/api/recipes/?limit={limit}')
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_list_anonymous(self):
+        self.assert_list_queries()
+
+    def test_list_authenticated(self):
+        self.client.force_authenticate(self.user)
+        self.assert_list_queries()
+        response = self.get(f'/api/recipes/?limit={self.RECIPES}')
+        flags = {item['id']: item['is_favorited']
+                 for item in response.data['results']}
+        self.assertEqual(
+            {pk for pk, favorited in flags.items() if favorited},
+            {recipe.id for recipe in self.recipes[::2]}
+        )
+        self.assertTrue(all(item['author']['is_subscribed']
+                            for item in response.data['results']))
+
+    def test_detail_anonymous(self):
+        with self.assertNumQueries(DETAIL_QUERIES):
+            response = self.get(f'/api/recipes/{self.recipes[0].id}/')
+        self.assertFalse(response.data['is_favorited'])
+        self.assertFalse(response.data['author']['is_subscribed'])
+
+    def test_detail_authenticated(self):
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(DETAIL_QUERIES):
+            response = self.get(f'/api/recipes/{self.recipes[0].id}/')
+        self.assertTrue(response.data['is_favorited'])
+        self.assertTrue(response.data['is_in_shopping_cart'])
+        self.assertTrue(response.data['author']['is_subscribed'])
+        self.assertEqual(len(response.data['ingredients']), 5)
+
+
+class RecipeWriteQueriesTest(FoodgramAPITestCase):
+    """Число запросов записи рецепта не зависит от числа ингредиентов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        ShoppingList.objects.create(user=cls.user, recipe=cls.recipes[0])
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.author)
+
+    def send(self, method, path, ingredients, **data):
+        # Количество совпадает с количеством в первом рецепте.
+        data.update(
+            ingredients=[{'id': ingredient.id, 'amount': 1}
+                         for ingredient in ingredients],
+            tags=[tag.id for tag in self.tags[:2]]
+        )
+        # Обработчики после фиксации тоже входят в стоимость запроса.
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(path, data,
+                                                    format='json')
+        self.assertLess(response.status_code, 300, response.data)
+        self.assertEqual(len(response.data['ingredients']),
+                         len(ingredients))
+        return response
+
+    def post(self, ingredients):
+        return self.send('post', '/api/recipes/', ingredients,
+                         name=f'Новый {len(ingredients)}', text='Описание',
+                         cooking_time=5, image=make_image())
+
+    def patch(self, ingredients):
+        return self.send('patch', f'/api/recipes/{self.recipes[0].id}/',
+                         ingredients)
+
+    def test_post(self):
+        for count in (1, 10):
+            with self.subTest(ingredients=count):
+                with self.assertNumQueries(POST_QUERIES):
+                    self.post(self.ingredients[:count])
+
+    def test_patch_added(self):
+        for count in (6, 20):
+            with self.subTest(ingredients=count):
+                with self.assertNumQueries(PATCH_ADDED_QUERIES):
+                    self.patch(self.ingredients[:count])
+                self.patch(self.ingredients[:5])
+
+    def test_patch_removed(self):
+        for count in (4, 1):
+            with self.subTest(ingredients=count):
+                self.patch(self.ingredients[:20])
+                with self.assertNumQueries(PATCH_REMOVED_QUERIES):
+                    self.patch(self.ingredients[:count])
+
+    def test_patch_unchanged(self):
+        with self.assertNumQueries(PATCH_UNCHANGED_QUERIES):
+            self.patch(self.ingredients[:5])
@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.db import transaction
+from recipes.models import IngredientInRecipe, Recipe
+from recipes.search import update_search_vectors
+from recipes.signals import recipe_batches
+
+from .base import FoodgramAPITestCase
+
+
+class SearchVectorTest(FoodgramAPITestCase):
+    """Обновление векторов поиска после изменения ингредиентов."""
+
+    def search(self, text):
+        response = self.client.get(f'/api/recipes/?search={text}')
+        return [item['id'] for item in response.data['results']]
+
+    def vector_updates(self, callbacks):
+        return [callback for callback in callbacks
+                if getattr(callback, 'action', None) is update_search_vectors]
+
+    def test_ingredient_rows(self):
+        recipe = self.recipes[0]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, \
+                recipe_batches():
+            IngredientInRecipe.objects.filter(recipe=recipe).delete()
+            IngredientInRecipe.objects.create(
+                recipe=recipe, ingredient=self.ingredients[10], amount=1
+            )
+            recipe.save()
+        updates = self.vector_updates(callbacks)
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(updates[0].recipe_ids, {recipe.id})
+        self.assertEqual(self.search('Ингредиент 10'), [recipe.id])
+
+    def test_rollback(self):
+        recipe = self.recipes[0]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    recipe.save()
+                    raise ValueError
+            except ValueError:
+                pass
+            IngredientInRecipe.objects.create(
+                recipe=recipe, ingredient=self.ingredients[10], amount=1
+            )
+        self.assertEqual(len(self.vector_updates(callbacks)), 1)
+        self.assertEqual(self.search('Ингредиент 10'), [recipe.id])
+
+    def test_batch_rollback(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with recipe_batches():
+                    IngredientInRecipe.objects.create(
+                        recipe=self.recipes[0],
+                        ingredient=self.ingredients[10], amount=1
+                    )
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(self.vector_updates(callbacks), [])
+        self.assertEqual(self.search('Ингредиент 10'), [])
+
+
+class SubstringSearchTest(FoodgramAPITestCase):
+    """Поиск по подстроке на СУБД без полнотекстового поиска."""
+
+    def search(self, text):
+        # На PostgreSQL ветка подстроки выбирается подменой СУБД.
+        with mock.patch('recipes.search.connection',
+                        mock.Mock(vendor='sqlite')):
+            response = self.client.get('/api/recipes/', {'search': text})
+        return {item['id'] for item in response.data['results']}
+
+    def test_fields(self):
+        first, second, third = self.recipes[:3]
+        Recipe.objects.filter(pk=first.pk).update(text='Особый рецепт')
+        IngredientInRecipe.objects.create(
+            recipe=second, ingredient=self.ingredients[15], amount=1
+        )
+        # Части слов полнотекстовый поиск не находит.
+        self.assertEqual(self.search('собый'), {first.id})
+        self.assertEqual(self.search('диент 15'), {second.id})
+        self.assertEqual(self.search('цепт 2'), {third.id})
+        self.assertEqual(self.search('нет такого'), set())
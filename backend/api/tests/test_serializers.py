@@ -0,0 +1,51 @@
+from rest_framework.test import APIRequestFactory
+from api.serializers import RecipeReadSerializer, SimpleRecipeSerializer
+from recipes.images import FORMATS
+from recipes.models import Recipe
+
+from .base import FoodgramAPITestCase
+
+HASH = 'a' * 64
+# Без WebP в сборке Pillow вместо него отдается JPEG.
+WEBP = 'webp' if 'webp' in FORMATS else 'jpg'
+
+
+class RecipeImageSerializerTest(FoodgramAPITestCase):
+    """Ссылки на изображение рецепта и его варианты."""
+
+    def setUp(self):
+        super().setUp()
+        self.request = APIRequestFactory().get('/api/recipes/')
+        self.request.user = self.user
+
+    def get_recipe(self):
+        return Recipe.objects.with_related().with_user_flags(
+            self.user
+        ).get(pk=self.recipes[0].pk)
+
+    def test_read_serializer_renders_recipe(self):
+        data = RecipeReadSerializer(
+            self.get_recipe(), context={'request': self.request}
+        ).data
+        self.assertEqual(data['id'], self.recipes[0].id)
+        self.assertEqual(len(data['ingredients']), 5)
+        self.assertTrue(data['author']['is_subscribed'])
+        # Изображения без вариантов отдаются оригиналом.
+        self.assertTrue(data['image'].endswith('recipes/images/recipe.jpg'))
+        self.assertEqual(data['image'], data['image_webp'])
+
+    def test_processed_image_variants(self):
+        Recipe.objects.filter(pk=self.recipes[0].pk).update(
+            image=f'recipes/images/{HASH}.png'
+        )
+        recipe = self.get_recipe()
+        data = RecipeReadSerializer(
+            recipe, context={'request': self.request}
+        ).data
+        self.assertTrue(data['image'].endswith(f'{HASH}_detail.jpg'))
+        self.assertTrue(data['image_webp'].endswith(f'{HASH}_detail.{WEBP}'))
+        data = SimpleRecipeSerializer(
+            recipe, context={'request': self.request}
+        ).data
+        self.assertTrue(data['image'].endswith(f'{HASH}_card.jpg'))
+        self.assertTrue(data['image_webp'].endswith(f'{HASH}_card.{WEBP}'))
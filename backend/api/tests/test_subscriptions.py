@@ -0,0 +1,33 @@
+from users.models import Subscription
+
+from .base import FoodgramAPITestCase
+
+
+class RecipesLimitTest(FoodgramAPITestCase):
+    """Параметр recipes_limit в ответах подписок."""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_subscriptions(self):
+        response = self.client.get('/api/users/subscriptions/'
+                                   '?recipes_limit=3')
+        self.assertEqual(len(response.data['results'][0]['recipes']), 3)
+        response = self.client.get('/api/users/subscriptions/'
+                                   '?recipes_limit=abc')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results'][0]['recipes']),
+                         self.RECIPES)
+
+    def test_subscribe(self):
+        Subscription.objects.all().delete()
+        for limit, count in (('abc', self.RECIPES), ('-1', 0), ('2', 2)):
+            with self.subTest(limit=limit):
+                response = self.client.post(
+                    f'/api/users/{self.author.id}/subscribe/'
+                    f'?recipes_limit={limit}'
+                )
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(len(response.data['recipes']), count)
+                Subscription.objects.all().delete()
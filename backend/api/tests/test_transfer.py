@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError
+from PIL import Image
+from recipes.jsonl_transfer import RecipeImporter
+from recipes.models import Recipe
+
+from .base import MEDIA_ROOT, FoodgramAPITestCase
+
+
+class ExportRecipesTest(FoodgramAPITestCase):
+    """Команда export_recipes."""
+
+    def test_missing_directory(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        os.makedirs(os.path.join(MEDIA_ROOT, 'recipes', 'images'),
+                    exist_ok=True)
+        with open(os.path.join(MEDIA_ROOT, self.recipes[0].image.name),
+                  'wb') as image:
+            image.write(b'image')
+        path = os.path.join(directory, 'export', 'recipes.jsonl')
+        call_command('export_recipes', path, stdout=StringIO())
+        with open(path, encoding='utf-8') as stream:
+            names = [json.loads(line)['name'] for line in stream]
+        self.assertEqual(names, [recipe.name for recipe in self.recipes])
+        self.assertEqual(os.listdir(os.path.join(directory, 'export',
+                                                 'recipes_images')),
+                         ['recipe.jpg'])
+
+
+class ImportRecipesTest(FoodgramAPITestCase):
+    """Загрузка рецептов из JSON Lines."""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.write_image('blue')
+        self.lines = [json.dumps({
+            'author': self.author.email, 'name': f'Импорт {number}',
+            'text': 'Описание', 'cooking_time': 5, 'image': 'new.png',
+            'tags': [self.tags[0].slug],
+            'ingredients': [{
+                'name': self.ingredients[0].name,
+                'measurement_unit': self.ingredients[0].measurement_unit,
+                'amount': 10,
+            }],
+        }) for number in range(2)]
+
+    def write_image(self, color):
+        Image.new('RGB', (8, 8), color).save(
+            os.path.join(self.directory, 'new.png')
+        )
+
+    def images(self):
+        directory = os.path.join(MEDIA_ROOT, 'recipes', 'images')
+        if not os.path.isdir(directory):
+            return set()
+        return set(os.listdir(directory))
+
+    def test_failed_chunk_removes_images(self):
+        # Содержимое, которого еще нет в хранилище.
+        self.write_image('green')
+        before = self.images()
+        importer = RecipeImporter(self.directory)
+        with mock.patch.object(RecipeImporter, 'save_chunk',
+                               side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                importer.run(self.lines)
+        self.assertEqual(self.images(), before)
+        self.assertEqual(importer.images, {})
+
+    def test_saved_chunk_keeps_images(self):
+        results = RecipeImporter(self.directory).run(self.lines)
+        self.assertEqual(results['created'], 2)
+        image = Recipe.objects.get(name='Импорт 0').image
+        self.assertTrue(image.storage.exists(image.name))
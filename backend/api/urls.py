@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import async_view
 from .views import (FoodgramUserViewSet, SubscriptionsViewSet,
                     RecipeViewSet, TagViewSet,
                     IngredientViewSet, FavoriteViewSet, ShoppingListViewSet)
@@ -13,22 +15,44 @@ router.register('tags', TagViewSet, basename='tags')
 router.register('ingredients', IngredientViewSet, basename='ingredients')
 router.register('recipes', RecipeViewSet, basename='recipes')
 
+
+def server_view(view):
+    """Представление для выбранного режима сервера (WSGI или ASGI)."""
+    return async_view(view) if settings.ASYNC_VIEWS else view
+
+
 urlpatterns = [
     path('users/subscriptions/',
-         SubscriptionsViewSet.as_view({'get': 'list'}),
+         server_view(SubscriptionsViewSet.as_view({'get': 'list'})),
          name='subscriptions'),
     path('users/<id>/subscribe/',
          SubscriptionsViewSet.as_view({'post': 'create', 'delete': 'delete'}),
          name='subscribe'),
     path('recipes/download_shopping_cart/',
-         ShoppingListViewSet.as_view({'get': 'download_shopping_cart'}),
+         server_view(ShoppingListViewSet.as_view(
+             {'get': 'download_shopping_cart'}
+         )),
          name='download_shopping_cart'),
+    path('recipes/shopping_cart/',
+         ShoppingListViewSet.as_view({'get': 'preview',
+                                      'post': 'batch_create',
+                                      'delete': 'batch_delete'}),
+         name='cart_batch'),
+    path('recipes/favorite/',
+         FavoriteViewSet.as_view({'post': 'batch_create',
+                                  'delete': 'batch_delete'}),
+         name='favorite_batch'),
     path('recipes/<id>/shopping_cart/',
          ShoppingListViewSet.as_view({'post': 'create', 'delete': 'delete'}),
          name='cart'),
     path('recipes/<id>/favorite/',
          FavoriteViewSet.as_view({'post': 'create', 'delete': 'delete'}),
          name='favorite'),
+    # Создание рецепта с обработкой изображения - до маршрутов роутера.
+    path('recipes/',
+         server_view(RecipeViewSet.as_view({'get': 'list',
+                                            'post': 'create'})),
+         name='recipes-list'),
     path('', include(router.urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken'))
@@ -1,63 +1,287 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (BooleanField, Count, Exists, Max, OuterRef,
+                              Prefetch, Sum, Value,
+                              prefetch_related_objects)
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from rest_framework import filters, status, viewsets
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import (IsAuthenticated, AllowAny,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
-
+from rest_framework.settings import api_settings
+from recipes.cart import change_cart_totals
+from recipes.catalogs import ingredient_index
+from recipes.cookable import recipe_ingredient_index
+from recipes.counters import change_counters, insert_user_recipes
 from recipes.models import (Tag, Ingredient, Recipe, IngredientInRecipe,
-                            ShoppingList, Favorite)
+                            ShoppingList, Favorite, RecipeSimilarity,
+                            CartTotal)
+from recipes.signals import recipe_batches
 from users.models import FoodgramUser, Subscription
+from .cache import bump_generation, user_label
 from .filters import RecipeFilter
-from .pagination import FoodgramPaginator
+from .mixins import CachedResponseMixin, ConditionalGetMixin, make_etag
+from .pagination import FoodgramPaginator, RecipePaginator
 from .permissions import RecipePermission
 from .serializers import (TagSerializer, IngredientSerializer,
                           SubscriptionSerializer, RecipeChangeSerializer,
                           RecipeReadSerializer, FoodgramUserSerializer,
                           FoodgramUserCreateSerializer,
-                          FavoriteSerializer, ShoppingListSerializer)
+                          FavoriteSerializer, ShoppingListSerializer,
+                          RecipeIdsSerializer, CookableQuerySerializer,
+                          CookableRecipeSerializer, SimpleRecipeSerializer,
+                          CartTotalSerializer, recipes_limit)
+
+
+def shopping_cart_lines(totals):
+    """Построчно формирует текст списка покупок."""
+    yield 'Список покупок с сайта Foodgram:\n\n'
+    for name, amount, unit in totals.iterator():
+        yield f'{name}, {amount.normalize():f} {unit}\n'
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ConditionalGetMixin, CachedResponseMixin,
+                 viewsets.ReadOnlyModelViewSet):
     """Класс-вьюсет для модели Tag."""
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
+    cache_models = (Tag,)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, CachedResponseMixin,
+                        viewsets.ReadOnlyModelViewSet):
     """Класс-вьюсет для модели Ingredient."""
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('^name',)
     permission_classes = (AllowAny,)
+    cache_models = (Ingredient,)
 
+    def list(self, request, *args, **kwargs):
+        # Поиск по началу названия обслуживается индексом в памяти.
+        name = request.query_params.get(api_settings.SEARCH_PARAM)
+        if name:
+            return self.conditional_response(self.search, request, name)
+        return super().list(request, *args, **kwargs)
 
-class RecipeViewSet(viewsets.ModelViewSet):
+    def search(self, request, name):
+        return Response(ingredient_index.search(name))
+
+
+class RecipeViewSet(ConditionalGetMixin, CachedResponseMixin,
+                    viewsets.ModelViewSet):
     """Класс-вьюсет для модели Recipe."""
     http_method_names = ['get', 'post', 'patch', 'create', 'delete']
     queryset = Recipe.objects.all()
     permission_classes = (RecipePermission,)
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
-    pagination_class = FoodgramPaginator
+    pagination_class = RecipePaginator
+    # Ответы авторизованным содержат признаки избранного и корзины.
+    cache_models = (Recipe, Tag, Ingredient, IngredientInRecipe,
+                    FoodgramUser)
+    cache_anonymous_only = True
+
+    def get_queryset(self):
+        # Один аннотированный запрос на страницу + prefetch тегов и
+        # ингредиентов: число запросов не зависит от размера страницы.
+        return Recipe.objects.with_related().with_user_flags(
+            self.request.user
+        )
 
     def get_serializer_class(self):
         if self.action in ['create', 'partial_update']:
             return RecipeChangeSerializer
         return RecipeReadSerializer
 
+    def perform_destroy(self, instance):
+        # Каскадное удаление строк ингредиентов: один пересчет на рецепт.
+        with recipe_batches():
+            instance.delete()
+
+    @action(detail=False, methods=('get',))
+    def cookable(self, request):
+        # Ингредиенты передаются повтором параметра или через запятую.
+        query = CookableQuerySerializer(data={
+            'ingredients': [
+                value for param in request.query_params.getlist(
+                    'ingredients'
+                ) for value in param.split(',') if value
+            ],
+            'limit': request.query_params.get('limit', 20),
+        })
+        query.is_valid(raise_exception=True)
+        results = recipe_ingredient_index.search(
+            query.validated_data['ingredients'],
+            query.validated_data['limit']
+        )
+        recipes = Recipe.objects.in_bulk(
+            [item['recipe_id'] for item in results]
+        )
+        ingredients = Ingredient.objects.in_bulk(
+            {pk for item in results for pk in item['missing']}
+        )
+        items = [
+            dict(item, recipe=recipes[item['recipe_id']],
+                 missing=[ingredients[pk] for pk in item['missing']
+                          if pk in ingredients])
+            for item in results if item['recipe_id'] in recipes
+        ]
+        return Response(CookableRecipeSerializer(
+            items, many=True, context=self.get_serializer_context()
+        ).data)
+
+    def get_limit(self, default=20):
+        try:
+            limit = int(self.request.query_params.get('limit', default))
+        except ValueError:
+            limit = default
+        return min(max(limit, 1), settings.MAX_SIMILAR_RECIPES)
+
+    @action(detail=True, methods=('get',))
+    def similar(self, request, pk=None):
+        # Только предрасчитанная таблица (см. build_recommendations).
+        recipe = get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        similarities = RecipeSimilarity.objects.filter(
+            recipe=recipe
+        ).select_related('similar').order_by('-score')[:self.get_limit()]
+        return Response(SimpleRecipeSerializer(
+            [similarity.similar for similarity in similarities], many=True,
+            context=self.get_serializer_context()
+        ).data)
+
+    @action(detail=False, methods=('get',),
+            permission_classes=(IsAuthenticated,))
+    def recommended(self, request):
+        # Сумма сходства с рецептами из избранного пользователя.
+        liked = Favorite.objects.filter(
+            user=request.user
+        ).values('recipe_id')
+        scores = RecipeSimilarity.objects.filter(
+            recipe_id__in=liked
+        ).exclude(
+            similar_id__in=liked
+        ).values('similar_id').annotate(
+            total=Sum('score')
+        ).order_by('-total', '-similar_id')[:self.get_limit()]
+        ids = [row['similar_id'] for row in scores]
+        recipes = Recipe.objects.in_bulk(ids)
+        return Response(SimpleRecipeSerializer(
+            [recipes[pk] for pk in ids if pk in recipes], many=True,
+            context=self.get_serializer_context()
+        ).data)
+
+    def get_validators(self, request):
+        if self.action != 'retrieve':
+            # Список: поколения моделей и данных пользователя, как у
+            # справочников, без запроса к базе. Last-Modified не
+            # отдается: updated_at не меняется при изменении счетчиков и
+            # удалении рецептов.
+            etag, _ = super().get_validators(request)
+            return make_etag(etag, self.get_user_generation(request)), None
+        # Версия рецепта - updated_at.
+        try:
+            recipes = Recipe.objects.filter(pk=self.kwargs['pk'])
+        except (TypeError, ValueError):
+            # Некорректный pk: ответ 404 сформирует сам обработчик.
+            return None, None
+        state = recipes.aggregate(
+            last_modified=Max('updated_at'),
+            count=Count('id'),
+            favorites=Sum('favorites_count'),
+            in_carts=Sum('in_carts_count')
+        )
+        last_modified = state['last_modified']
+        user_generation = self.get_user_generation(request)
+        etag = make_etag(
+            request.accepted_renderer.format,
+            request.get_full_path(),
+            last_modified,
+            state['count'],
+            state['favorites'],
+            state['in_carts'],
+            user_generation
+        )
+        # Признаки избранного и корзины меняются без изменения рецепта.
+        if user_generation is not None or last_modified is None:
+            return etag, None
+        return etag, int(last_modified.timestamp())
+
+
+class RecipesBatchMixin:
+    """
+    Пакетное добавление и удаление рецептов в списке пользователя.
 
-class FavoriteViewSet(viewsets.ModelViewSet):
+    Рецепты из запроса проверяются одним запросом, новые записи
+    добавляются одной вставкой. Вставка не отправляет сигналов,
+    поэтому счетчик counter_field и кэш обновляются в after_batch
+    только для действительно вставленных записей.
+    Удаление идет через delete(): счетчики, итоги корзины и кэш
+    обновляют обработчики сигналов удаления.
+    """
+    counter_field = None
+
+    def get_linked_recipes(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['recipes']
+        model = self.queryset.model
+        linked = dict(Recipe.objects.filter(id__in=ids).annotate(
+            linked=Exists(model.objects.filter(
+                user=request.user, recipe=OuterRef('pk')
+            ))
+        ).values_list('id', 'linked'))
+        return ids, linked
+
+    def after_batch(self, request, recipe_ids):
+        # Одно обновление счетчиков вместо сигнала на каждую запись.
+        change_counters(Recipe, recipe_ids, self.counter_field, 1)
+        label = user_label(request.user.id)
+        transaction.on_commit(lambda: bump_generation(label))
+
+    @transaction.atomic
+    def batch_create(self, request, *args, **kwargs):
+        ids, linked = self.get_linked_recipes(request)
+        added = insert_user_recipes(
+            self.queryset.model, request.user.id,
+            [pk for pk in ids if linked.get(pk) is False]
+        )
+        # Записи, добавленные параллельным запросом после проверки.
+        inserted = set(added)
+        linked.update({pk: True for pk, state in linked.items()
+                       if state is False and pk not in inserted})
+        if added:
+            self.after_batch(request, added)
+        statuses = {False: 'added', True: 'exists', None: 'not_found'}
+        return Response(
+            [{'id': pk, 'status': statuses[linked.get(pk)]} for pk in ids],
+            status=status.HTTP_201_CREATED if added else status.HTTP_200_OK
+        )
+
+    @transaction.atomic
+    def batch_delete(self, request, *args, **kwargs):
+        ids, linked = self.get_linked_recipes(request)
+        removed = [pk for pk in ids if linked.get(pk)]
+        if removed:
+            self.queryset.model.objects.filter(
+                user=request.user, recipe_id__in=removed
+            ).delete()
+        statuses = {True: 'removed', False: 'absent', None: 'not_found'}
+        return Response(
+            [{'id': pk, 'status': statuses[linked.get(pk)]} for pk in ids]
+        )
+
+
+class FavoriteViewSet(RecipesBatchMixin, viewsets.ModelViewSet):
     http_method_names = ['post', 'delete']
     queryset = Favorite.objects.all()
     serializer_class = FavoriteSerializer
     permission_classes = (IsAuthenticated,)
+    counter_field = 'favorites_count'
 
     def delete(self, request, *args, **kwargs):
         recipe_id = kwargs.get("id", None)
@@ -68,12 +292,17 @@ class FavoriteViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class ShoppingListViewSet(viewsets.ModelViewSet):
+class ShoppingListViewSet(RecipesBatchMixin, viewsets.ModelViewSet):
     """Вьюсет для добавления и удаления рецептов в корзины покупок."""
     http_method_names = ['get', 'post', 'delete']
     queryset = ShoppingList.objects.all()
     serializer_class = ShoppingListSerializer
     permission_classes = [IsAuthenticated, ]
+    counter_field = 'in_carts_count'
+
+    def after_batch(self, request, recipe_ids):
+        super().after_batch(request, recipe_ids)
+        change_cart_totals(request.user.id, recipe_ids, 1)
 
     def delete(self, request, *args, **kwargs):
         recipe_id = kwargs.get("id", None)
@@ -83,36 +312,30 @@ class ShoppingListViewSet(viewsets.ModelViewSet):
                           recipe_id=recipe.id).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def get_totals(self):
+        # Итоги корзины поддерживаются при ее изменении (recipes.cart):
+        # одно чтение по индексу unique_cart_total.
+        return CartTotal.objects.filter(
+            user=self.request.user
+        ).order_by('name', 'unit')
+
+    def preview(self, request):
+        return Response(
+            CartTotalSerializer(self.get_totals(), many=True).data
+        )
+
     @action(
         detail=False,
         methods=('get',),
         permission_classes=(IsAuthenticated,)
     )
     def download_shopping_cart(self, request):
-        shopping_cart = (
-            ShoppingList.objects.filter(
-                user=self.request.user
-            )
+        # Строки файла отдаются генератором по мере чтения курсора.
+        totals = self.get_totals().values_list('name', 'amount', 'unit')
+        response = StreamingHttpResponse(
+            shopping_cart_lines(totals),
+            content_type='text/plain'
         )
-        recipes = [item.recipe.id for item in shopping_cart]
-        shopping_list = IngredientInRecipe.objects.filter(
-            recipe__in=recipes
-        ).values(
-            'ingredient'
-        ).annotate(
-            amount=Sum('amount')
-        ).order_by('ingredient__name')
-
-        shopping_list_text = 'Список покупок с сайта Foodgram:\n\n'
-        for item in shopping_list:
-            ingredient = Ingredient.objects.get(pk=item['ingredient'])
-            amount = item['amount']
-            shopping_list_text += (
-                f'{ingredient.name}, {amount} '
-                f'{ingredient.measurement_unit}\n'
-            )
-
-        response = HttpResponse(shopping_list_text, content_type="text/plain")
         filename = 'shopping_list.txt'
         response['Content-Disposition'] = f'attachment; filename={filename}'
         return response
@@ -124,6 +347,18 @@ class FoodgramUserViewSet(UserViewSet):
     pagination_class = FoodgramPaginator
     permission_classes = (IsAuthenticatedOrReadOnly,)
 
+    def get_queryset(self):
+        # Признак подписки вычисляется в том же запросе, что и страница.
+        queryset = super().get_queryset()
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset.annotate(
+                is_subscribed=Value(False, output_field=BooleanField())
+            )
+        return queryset.annotate(is_subscribed=Exists(
+            Subscription.objects.filter(user=user, author=OuterRef('pk'))
+        ))
+
     def get_serializer_class(self):
         if self.action == 'create':
             return FoodgramUserCreateSerializer
@@ -141,7 +376,22 @@ class SubscriptionsViewSet(viewsets.ModelViewSet):
         user = self.request.user
         return Subscription.objects.filter(
             user=user
-        ).prefetch_related('author')
+        ).select_related('author')
+
+    def paginate_queryset(self, queryset):
+        # Свежие рецепты всех авторов страницы загружаются одним запросом.
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            authors = [subscription.author for subscription in page]
+            prefetch_related_objects(authors, Prefetch(
+                'recipes',
+                queryset=Recipe.objects.newest_per_author(
+                    [author.id for author in authors],
+                    recipes_limit(self.request)
+                ),
+                to_attr='recipes_preview'
+            ))
+        return page
 
     def delete(self, request, *args, **kwargs):
         author_id = kwargs.get("id", None)
@@ -10,7 +10,12 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from foodgram.monitoring import init_sentry
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
 application = get_asgi_application()
+
+# При предзагрузке в gunicorn Sentry подключается в воркерах после fork.
+if not os.getenv('FOODGRAM_PRELOAD'):
+    init_sentry()
@@ -0,0 +1,165 @@
+"""
+Модуль промежуточного слоя для учета SQL запросов.
+
+Для каждого запроса к серверу считаются число SQL запросов, их суммарное
+время, точные повторы (тот же SQL с теми же параметрами) и похожие
+запросы (тот же SQL с точностью до значений) - признак N+1.
+Итоги отдаются в заголовке Server-Timing и пишутся в лог foodgram.sql.
+Слой работает и в синхронном (WSGI), и в асинхронном (ASGI) режиме.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('foodgram.sql')
+
+# Статистика текущего запроса к серверу.
+current_stats = ContextVar('current_stats', default=None)
+
+# Замены для получения отпечатка запроса: значения и списки IN.
+FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%s|\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def fingerprint(sql):
+    """SQL запрос без конкретных значений параметров."""
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class QueryStats:
+    """Обертка выполнения запросов, собирающая статистику."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[(sql, repr(params))] += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values())
+
+    @property
+    def similar(self):
+        return sum(count - 1 for count in self.fingerprints.values())
+
+    def repeated(self, limit):
+        return [
+            {'count': count, 'sql': sql}
+            for sql, count in self.fingerprints.most_common(limit)
+            if count > 1
+        ]
+
+
+def record_query(execute, sql, params, many, context):
+    """Передает запрос статистике текущего запроса к серверу."""
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install(connection, **kwargs):
+    """Подключает учет к соединению потока (в том числе пула ASGI)."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install)
+
+
+class QueryCountMiddleware:
+    """
+    Учет SQL запросов каждого запроса к серверу.
+
+    Статистика хранится в переменной контекста, поэтому в режиме ASGI
+    учитываются и запросы, выполненные в потоках sync_to_async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Признак корутины для обработчика Django.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        install(connection)
+        stats = QueryStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats, started)
+
+    def finish(self, request, response, stats, started):
+        total = (time.perf_counter() - started) * 1000
+        db_time = stats.duration * 1000
+        # Запросы потоковых ответов выполняются после выхода из слоя.
+        response['Server-Timing'] = (
+            f'db;dur={db_time:.2f}, queries;desc="{stats.count}", '
+            f'duplicates;desc="{stats.duplicates}", '
+            f'similar;desc="{stats.similar}", app;dur={total:.2f}'
+        )
+        self.log(request, response, stats, db_time, total)
+        return response
+
+    @staticmethod
+    def log(request, response, stats, db_time, total):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': stats.count,
+            'duplicates': stats.duplicates,
+            'similar': stats.similar,
+            'db_ms': round(db_time, 2),
+            'total_ms': round(total, 2),
+        }
+        if (stats.count > settings.SQL_LOG_MAX_QUERIES
+                or db_time > settings.SQL_LOG_MAX_DB_TIME
+                or stats.similar > settings.SQL_LOG_MAX_SIMILAR):
+            record['repeated'] = stats.repeated(settings.SQL_LOG_FINGERPRINTS)
+            logger.warning(json.dumps(record, ensure_ascii=False))
+        else:
+            logger.info(json.dumps(record, ensure_ascii=False))
@@ -0,0 +1,31 @@
+"""
+Модуль подключения Sentry.
+
+Клиент Sentry запускает фоновый поток отправки событий, который не
+переживает fork, поэтому инициализация вынесена из настроек: процесс
+вызывает init_sentry после запуска, а при предзагрузке приложения в
+мастере gunicorn - каждый воркер после fork (см. gunicorn.conf.py).
+"""
+import os
+
+import sentry_sdk
+from django.conf import settings
+from sentry_sdk.integrations.django import DjangoIntegration
+
+_initialized_pid = None
+
+
+def init_sentry():
+    """Инициализирует Sentry один раз в каждом процессе."""
+    global _initialized_pid
+    if _initialized_pid == os.getpid():
+        return
+    _initialized_pid = os.getpid()
+    sentry_sdk.init(
+        dsn=settings.DSN,
+        integrations=[
+            DjangoIntegration(),
+        ],
+        traces_sample_rate=settings.SENTRY_TRACES_SAMPLE_RATE,
+        send_default_pii=True
+    )
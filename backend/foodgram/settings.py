@@ -5,8 +5,6 @@ Django's settings for foodgram project.
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-import sentry_sdk
-from sentry_sdk.integrations.django import DjangoIntegration
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -15,6 +13,10 @@ load_dotenv()
 SECRET_KEY = os.getenv('SECRET_KEY', 'SECRET_KEY')
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS').split(',')
 DSN = os.getenv('DSN')
+# Sentry подключается в foodgram.monitoring после запуска процесса.
+SENTRY_TRACES_SAMPLE_RATE = float(
+    os.getenv('SENTRY_TRACES_SAMPLE_RATE', 1.0)
+)
 DEBUG = os.getenv('DJANGO_DEBUG', 'Да').upper() == 'ДА'
 
 INSTALLED_APPS = [
@@ -34,6 +36,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -75,15 +78,80 @@ DATABASES = {
     }
 }
 
-sentry_sdk.init(
-    dsn=DSN,
-    integrations=[
-        DjangoIntegration(),
-    ],
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    # Требует установленного пакета django-redis.
+    'redis': 'django_redis.cache.RedisCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
 
-    traces_sample_rate=1.0,
-    send_default_pii=True
-)
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            os.path.join(BASE_DIR, 'cache') if CACHE_BACKEND == 'file' else ''
+        ),
+    }
+}
+if CACHE_BACKEND in ('locmem', 'file'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000)),
+    }
+
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 300))
+
+# Режим сервера: wsgi (синхронные воркеры gunicorn) или asgi (uvicorn).
+# Под ASGI тяжелые представления выполняются в пуле потоков размером
+# ASYNC_VIEW_THREADS, см. api.async_views.
+FOODGRAM_SERVER = os.getenv('FOODGRAM_SERVER', 'wsgi')
+ASYNC_VIEWS = FOODGRAM_SERVER == 'asgi'
+ASYNC_VIEW_THREADS = int(os.getenv('ASYNC_VIEW_THREADS', 8))
+
+# Возраст прогрева мастера gunicorn в секундах, после которого новые
+# воркеры загружают справочники заново (см. foodgram.warmup).
+WARMUP_MAX_AGE = int(os.getenv('WARMUP_MAX_AGE', 60))
+
+# Кэш токенов в памяти процесса: число записей и время жизни в секундах.
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', 60))
+
+# Пороги, после которых запрос к серверу пишется в лог foodgram.sql
+# с отпечатками повторяющихся SQL запросов.
+SQL_LOG_MAX_QUERIES = int(os.getenv('SQL_LOG_MAX_QUERIES', 30))
+SQL_LOG_MAX_DB_TIME = float(os.getenv('SQL_LOG_MAX_DB_TIME', 200))
+SQL_LOG_MAX_SIMILAR = int(os.getenv('SQL_LOG_MAX_SIMILAR', 5))
+SQL_LOG_FINGERPRINTS = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'plain',
+        },
+    },
+    'loggers': {
+        'foodgram.sql': {
+            'handlers': ['console'],
+            'level': os.getenv('SQL_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+        'foodgram.warmup': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -134,7 +202,7 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
 
     'SEARCH_PARAM': 'name',
@@ -151,6 +219,10 @@ MAX_LENGTH_INGREDIENT = 200
 MAX_LENGTH_MEASUREMENT_UNIT = 200
 MAX_LENGTH_SLUG = 50
 MAX_LENGTH_UNIT = 50
+MAX_BATCH_RECIPES = 100
+MAX_COOKABLE_INGREDIENTS = 100
+MAX_COOKABLE_LIMIT = 100
+MAX_SIMILAR_RECIPES = 50
 
 DJOSER = {
     'USER_AUTHENTICATION_RULE': 'djoser.authentication.AllAuth',
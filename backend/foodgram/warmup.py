@@ -0,0 +1,141 @@
+"""
+Модуль прогрева приложения перед запуском воркеров.
+
+При предзагрузке (GUNICORN_PRELOAD) мастер gunicorn импортирует
+приложение и вызывает warmup до fork: воркеры получают готовые
+маршруты, настройки DRF и djoser с импортированными классами, кэши
+метаданных моделей, каталоги переводов и справочники в памяти процесса
+вместо того, чтобы строить их на первых запросах. Соединения с базой
+закрываются перед fork - сокет нельзя делить между процессами.
+
+Справочники сверяют поколение в кэше API при каждом обращении. С кэшем
+в памяти процесса (locmem) воркер получает копию кэша мастера, которая
+не знает об изменениях после прогрева, поэтому воркер, запущенный позже
+WARMUP_MAX_AGE секунд после прогрева (например, вместо упавшего),
+сбрасывает свою копию справочников и загружает их заново.
+"""
+import inspect
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver
+from django.utils import translation
+from djoser.conf import settings as djoser_settings
+from PIL import Image
+from rest_framework.serializers import BaseSerializer
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger('foodgram.warmup')
+
+# Время завершения прогрева в мастере.
+warmed_at = None
+
+# Настройки DRF, классы которых импортируются при первом обращении.
+API_SETTINGS = (
+    'DEFAULT_AUTHENTICATION_CLASSES',
+    'DEFAULT_PERMISSION_CLASSES',
+    'DEFAULT_RENDERER_CLASSES',
+    'DEFAULT_PARSER_CLASSES',
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS',
+    'DEFAULT_METADATA_CLASS',
+    'DEFAULT_VERSIONING_CLASS',
+    'DEFAULT_PAGINATION_CLASS',
+    'DEFAULT_FILTER_BACKENDS',
+    'DEFAULT_SCHEMA_CLASS',
+    'EXCEPTION_HANDLER',
+)
+
+
+def warm_settings():
+    for name in API_SETTINGS:
+        getattr(api_settings, name)
+    djoser_settings.SERIALIZERS.user
+    djoser_settings.SERIALIZERS.current_user
+    djoser_settings.SERIALIZERS.user_create
+    djoser_settings.PERMISSIONS.user
+    djoser_settings.PERMISSIONS.user_list
+
+
+def warm_urls():
+    resolver = get_resolver()
+    # Заполняет словари reverse и кэш разбора маршрутов.
+    resolver.reverse_dict
+    resolver.resolve('/api/recipes/')
+
+
+def warm_serializers():
+    """Строит поля всех сериализаторов API и метаданные их моделей."""
+    from api import serializers
+
+    for name, serializer in inspect.getmembers(serializers, inspect.isclass):
+        if (not issubclass(serializer, BaseSerializer)
+                or serializer.__module__ != serializers.__name__):
+            continue
+        try:
+            serializer(context={}).fields
+        except Exception:
+            logger.warning('Сериализатор %s не прогрет', name, exc_info=True)
+
+
+def get_catalogs():
+    from recipes.catalogs import ingredient_index, tag_slugs
+    from recipes.cookable import recipe_ingredient_index
+
+    return ingredient_index, tag_slugs, recipe_ingredient_index
+
+
+def warm_catalogs():
+    """Загружает справочники и индекс ингредиентов рецептов."""
+    for catalog in get_catalogs():
+        catalog.get_data()
+
+
+def warm_database():
+    # Проверяет настройки базы и загружает драйвер и типы соединения.
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+STEPS = (
+    ('settings', warm_settings),
+    ('urls', warm_urls),
+    ('translations', lambda: translation.activate(settings.LANGUAGE_CODE)),
+    ('images', Image.init),
+    ('serializers', warm_serializers),
+    ('database', warm_database),
+    ('catalogs', warm_catalogs),
+)
+
+
+def warmup():
+    """Прогрев приложения, возвращает время шагов в миллисекундах."""
+    global warmed_at
+    timings = {}
+    try:
+        for name, step in STEPS:
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception:
+                # Ошибка прогрева не должна мешать запуску сервера.
+                logger.warning('Шаг прогрева %s не выполнен', name,
+                               exc_info=True)
+            timings[name] = round((time.perf_counter() - started) * 1000, 2)
+    finally:
+        translation.deactivate()
+        connections.close_all()
+    warmed_at = time.monotonic()
+    logger.info('Прогрев: %s', timings)
+    return timings
+
+
+def after_fork():
+    """Сброс устаревших справочников в воркере после fork."""
+    if (warmed_at is not None
+            and time.monotonic() - warmed_at > settings.WARMUP_MAX_AGE):
+        # Только в этом процессе: поколение в общем кэше не меняется, и
+        # остальные воркеры справочники не перезагружают.
+        for catalog in get_catalogs():
+            catalog.reset()
@@ -10,7 +10,12 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
 import os
 
 from django.core.wsgi import get_wsgi_application
+from foodgram.monitoring import init_sentry
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
 application = get_wsgi_application()
+
+# При предзагрузке в gunicorn Sentry подключается в воркерах после fork.
+if not os.getenv('FOODGRAM_PRELOAD'):
+    init_sentry()
@@ -0,0 +1,42 @@
+"""
+Настройки gunicorn.
+
+FOODGRAM_SERVER=wsgi (по умолчанию) - синхронные воркеры и приложение
+WSGI, FOODGRAM_SERVER=asgi - воркеры uvicorn и приложение ASGI.
+
+GUNICORN_PRELOAD=Да (по умолчанию) - приложение импортируется и
+прогревается в мастере до fork (см. foodgram.warmup), Sentry
+подключается в каждом воркере после fork.
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0:9000')
+workers = int(os.getenv('GUNICORN_WORKERS', 3))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'Да').upper() == 'ДА'
+
+if os.getenv('FOODGRAM_SERVER', 'wsgi') == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    wsgi_app = 'foodgram.asgi:application'
+else:
+    wsgi_app = 'foodgram.wsgi:application'
+
+if preload_app:
+    # Модули приложения не подключают Sentry в мастере.
+    os.environ['FOODGRAM_PRELOAD'] = '1'
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from foodgram.warmup import warmup
+
+        warmup()
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from foodgram.monitoring import init_sentry
+        from foodgram.warmup import after_fork
+
+        init_sentry()
+        after_fork()
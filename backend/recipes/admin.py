@@ -1,7 +1,7 @@
 from django.contrib import admin, messages
 
 from . import models
-from .csv_import import run_import_csv
+from .csv_import import load_ingredients
 
 
 class BaseModelAdmin(admin.ModelAdmin):
@@ -28,7 +28,7 @@ class IngredientAdmin(BaseModelAdmin):
         description='Выполнить импорт данных из файла ingredients.csv'
     )
     def import_data(self, request, datasource):
-        results = run_import_csv()
+        results = load_ingredients()
         status = messages.ERROR
         false_message = f'{results["false"]} записей заполнены некорректно'
         dub_message = f'{results["dub"]} записей дублируются'
@@ -53,17 +53,13 @@ class IngredientAdmin(BaseModelAdmin):
 @admin.register(models.Recipe)
 class RecipeAdmin(BaseModelAdmin):
     """Настройки админки для рецептов."""
-    list_display = ('id', 'name', 'author')
+    list_display = ('id', 'name', 'author', 'favorites_count',
+                    'in_carts_count')
     list_display_links = ('name',)
     search_fields = ('name',)
     filter_horizontal = ('tags',)
     list_filter = ('author', 'name', 'tags')
-    readonly_fields = ('count_of_favorites',)
-
-    def count_of_favorites(self, obj):
-        return obj.liked.all().count()
-
-    count_of_favorites.short_description = 'Счётчик избранного'
+    readonly_fields = ('favorites_count', 'in_carts_count')
 
 
 @admin.register(models.IngredientInRecipe)
@@ -83,3 +79,10 @@ class FavoriteAdmin(admin.ModelAdmin):
 class ShoppingListAdmin(admin.ModelAdmin):
     """Настройки админки для списка покупок."""
     list_display = ('id', 'recipe', 'user')
+
+
+@admin.register(models.UnitConversion)
+class UnitConversionAdmin(BaseModelAdmin):
+    """Настройки админки для пересчета единиц измерения."""
+    list_display = ('id', 'unit', 'base_unit', 'factor')
+    list_editable = ('base_unit', 'factor')
@@ -0,0 +1,111 @@
+"""
+Модуль итогов списков покупок.
+
+CartTotal хранит для каждого пользователя суммы ингредиентов его
+списка покупок в базовых единицах (см. UnitConversion): «г» и «кг»,
+«мл» и «л» одного ингредиента дают одну строку. Добавление и удаление
+рецептов меняют суммы одним INSERT ... ON CONFLICT DO UPDATE; изменение
+состава рецептов, ингредиентов и таблицы пересчета ведет к полному
+пересчету итогов затронутых пользователей.
+"""
+from django.db import connection, transaction
+
+from .models import (CartTotal, Ingredient, IngredientInRecipe,
+                     ShoppingList, UnitConversion)
+
+
+def tables():
+    quote = connection.ops.quote_name
+    return {
+        'total': quote(CartTotal._meta.db_table),
+        'item': quote(IngredientInRecipe._meta.db_table),
+        'ingredient': quote(Ingredient._meta.db_table),
+        'conversion': quote(UnitConversion._meta.db_table),
+        'cart': quote(ShoppingList._meta.db_table),
+    }
+
+
+def placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+# Количество ингредиента в базовой единице.
+BASE_UNIT = 'COALESCE(conversion.base_unit, ingredient.measurement_unit)'
+BASE_AMOUNT = 'item.amount * COALESCE(conversion.factor, 1)'
+JOINS = (
+    'JOIN {ingredient} ingredient ON ingredient.id = item.ingredient_id '
+    'LEFT JOIN {conversion} conversion '
+    'ON conversion.unit = ingredient.measurement_unit '
+)
+
+
+def change_cart_totals(user_id, recipe_ids, sign):
+    """Прибавляет (sign=1) или вычитает (sign=-1) ингредиенты рецептов."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    sql = (
+        'INSERT INTO {total} (user_id, name, unit, amount) '
+        f'SELECT %s, ingredient.name, {BASE_UNIT}, SUM({BASE_AMOUNT}) * %s '
+        'FROM {item} item '
+        + JOINS
+        + f'WHERE item.recipe_id IN ({placeholders(recipe_ids)}) '
+        f'GROUP BY ingredient.name, {BASE_UNIT} '
+        'ON CONFLICT (user_id, name, unit) '
+        'DO UPDATE SET amount = {total}.amount + EXCLUDED.amount'
+    ).format(**tables())
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, sign, *recipe_ids])
+        if sign < 0:
+            cursor.execute(
+                'DELETE FROM {total} WHERE user_id = %s AND amount <= 0'
+                .format(**tables()),
+                [user_id]
+            )
+
+
+def rebuild_cart_totals(user_ids=None):
+    """
+    Полный пересчет итогов пользователей (по умолчанию всех).
+
+    Удаление и вставка выполняются в одной транзакции; строку, которую
+    между ними добавила параллельная транзакция, вставка перезаписывает.
+    """
+    totals = CartTotal.objects.all()
+    condition = ''
+    params = []
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+        totals = totals.filter(user_id__in=user_ids)
+        condition = f'WHERE cart.user_id IN ({placeholders(user_ids)}) '
+        params = user_ids
+    sql = (
+        'INSERT INTO {total} (user_id, name, unit, amount) '
+        f'SELECT cart.user_id, ingredient.name, {BASE_UNIT}, '
+        f'SUM({BASE_AMOUNT}) '
+        'FROM {cart} cart '
+        'JOIN {item} item ON item.recipe_id = cart.recipe_id '
+        + JOINS
+        + condition
+        + f'GROUP BY cart.user_id, ingredient.name, {BASE_UNIT} '
+        'ON CONFLICT (user_id, name, unit) '
+        'DO UPDATE SET amount = EXCLUDED.amount'
+    ).format(**tables())
+    with transaction.atomic(), connection.cursor() as cursor:
+        totals.delete()
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def cart_users(recipe_ids):
+    """Пользователи, у которых рецепты из списка лежат в корзине."""
+    return list(ShoppingList.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('user_id', flat=True).distinct())
+
+
+def rebuild_recipe_carts(recipe_ids):
+    """Пересчет итогов после изменения состава рецептов."""
+    rebuild_cart_totals(cart_users(recipe_ids))
@@ -0,0 +1,109 @@
+"""
+Модуль справочников, кэшируемых в памяти процесса.
+
+Справочники загружаются из базы при первом обращении и сбрасываются
+сигналами моделей (см. recipes.signals). Сброс виден всем процессам
+через поколения в общем кэше API.
+"""
+from bisect import bisect_left
+from threading import Lock
+
+from api.cache import bump_generation, get_generations
+from .models import Ingredient, Tag
+
+# Символ, заведомо больший любого другого: граница диапазона префикса.
+MAX_CHAR = chr(0x10FFFF)
+
+
+def normalize(value):
+    """Приводит строку к виду для поиска: без учета регистра и буквы ё."""
+    return value.strip().casefold().replace('ё', 'е')
+
+
+class Catalog:
+    """
+    Справочник в памяти процесса.
+
+    Данные загружаются методом _load при первом обращении. Вместе с ними
+    запоминается поколение метки label в кэше API (см. api.cache):
+    invalidate увеличивает поколение, и справочник перезагружается в
+    каждом процессе при следующем обращении. Метод reset сбрасывает
+    данные только текущего процесса.
+    """
+    label = None
+
+    def __init__(self):
+        self._lock = Lock()
+        self._data = None
+        self._generation = None
+
+    @staticmethod
+    def _load():
+        raise NotImplementedError
+
+    def get_data(self):
+        generation = get_generations([self.label])[0]
+        data = self._data
+        if data is None or self._generation != generation:
+            with self._lock:
+                if self._data is None or self._generation != generation:
+                    # Изменение во время загрузки увеличит поколение,
+                    # и следующее обращение загрузит данные заново.
+                    self._data = self._load()
+                    self._generation = generation
+                data = self._data
+        return data
+
+    def reset(self):
+        with self._lock:
+            self._data = None
+            self._generation = None
+
+    def invalidate(self):
+        bump_generation(self.label)
+        self.reset()
+
+
+class IngredientPrefixIndex(Catalog):
+    """Отсортированный массив ингредиентов для поиска по началу названия."""
+    label = 'catalog:ingredients'
+
+    @staticmethod
+    def _load():
+        entries = sorted(
+            (normalize(row['name']), row['id'], row)
+            for row in Ingredient.objects.values(
+                'id', 'name', 'measurement_unit'
+            )
+        )
+        keys = [key for key, _, _ in entries]
+        items = [row for _, _, row in entries]
+        return keys, items
+
+    def search(self, prefix):
+        """Ингредиенты, название которых начинается с prefix."""
+        keys, items = self.get_data()
+        prefix = normalize(prefix)
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + MAX_CHAR, start)
+        return items[start:end]
+
+
+class TagSlugMap(Catalog):
+    """Соответствие slug тега его id."""
+    label = 'catalog:tags'
+
+    @staticmethod
+    def _load():
+        return dict(Tag.objects.values_list('slug', 'id'))
+
+    def choices(self):
+        return [(slug, slug) for slug in self.get_data()]
+
+    def ids(self, slugs):
+        data = self.get_data()
+        return [data[slug] for slug in slugs if slug in data]
+
+
+ingredient_index = IngredientPrefixIndex()
+tag_slugs = TagSlugMap()
@@ -0,0 +1,146 @@
+"""
+Модуль поиска рецептов по имеющимся ингредиентам.
+
+Инвертированный индекс в памяти процесса: для каждого ингредиента -
+отсортированный массив позиций рецептов, для каждого рецепта - число
+и список его ингредиентов (массивы NumPy). Совпадения считаются одним
+np.bincount по объединению массивов выбранных ингредиентов.
+
+Изменения рецептов после фиксации попадают в небольшой слой поверх
+массивов (см. recipes.signals) и увеличивают поколение индекса в кэше
+API. Остальные процессы по новому поколению перестраивают индекс при
+следующем обращении, как и этот процесс, если слой разросся или индекс
+менялся еще где-то.
+"""
+import numpy as np
+
+from api.cache import bump_generation
+from .catalogs import Catalog
+from .models import IngredientInRecipe
+
+# Размер слоя изменений, после которого индекс перестраивается.
+MAX_OVERLAY = 1000
+
+
+class IndexData:
+    """Массивы индекса; позиция рецепта - индекс в recipe_ids."""
+
+    def __init__(self, pairs):
+        recipes, ingredients = pairs[:, 0], pairs[:, 1]
+        self.recipe_ids, positions = np.unique(recipes, return_inverse=True)
+        self.totals = np.bincount(positions)
+        # После сортировки по рецепту его ингредиенты идут подряд.
+        order = np.argsort(recipes, kind='stable')
+        self.ingredients = ingredients[order]
+        self.indptr = np.concatenate(([0], np.cumsum(self.totals)))
+        order = np.argsort(ingredients, kind='stable')
+        keys, starts = np.unique(ingredients[order], return_index=True)
+        self.postings = dict(zip(
+            keys.tolist(), np.split(positions[order], starts[1:])
+        ))
+        # id рецепта -> множество id его ингредиентов после изменения.
+        # Словарь заменяется целиком: поиск читает его без блокировки.
+        self.overlay = {}
+
+    def positions(self, recipe_ids):
+        """Позиции рецептов из списка, присутствующих в индексе."""
+        recipe_ids = np.asarray(recipe_ids, dtype=self.recipe_ids.dtype)
+        found = np.searchsorted(self.recipe_ids, recipe_ids)
+        found = found[found < len(self.recipe_ids)]
+        return found[np.isin(self.recipe_ids[found], recipe_ids)]
+
+    def match(self, ingredient_ids, exclude):
+        """Число совпавших ингредиентов для каждой позиции рецепта."""
+        arrays = [self.postings[pk] for pk in ingredient_ids
+                  if pk in self.postings]
+        if not arrays:
+            return np.zeros(len(self.recipe_ids), dtype=np.int64)
+        counts = np.bincount(np.concatenate(arrays),
+                             minlength=len(self.recipe_ids))
+        counts[self.positions(exclude)] = 0
+        return counts
+
+    def recipe_ingredients(self, position):
+        return self.ingredients[self.indptr[position]:
+                                self.indptr[position + 1]].tolist()
+
+
+class RecipeIngredientIndex(Catalog):
+    """Инвертированный индекс ингредиент -> рецепты."""
+    label = 'catalog:recipe_ingredients'
+
+    @staticmethod
+    def _load():
+        rows = IngredientInRecipe.objects.order_by('recipe_id').values_list(
+            'recipe_id', 'ingredient_id'
+        ).iterator()
+        pairs = np.fromiter(
+            (value for pair in rows for value in pair), dtype=np.int64
+        ).reshape(-1, 2)
+        return IndexData(pairs)
+
+    def refresh(self, recipe_ids):
+        """Перечитывает ингредиенты рецептов, в том числе удаленных."""
+        overlay = {pk: set() for pk in recipe_ids}
+        for recipe_id, ingredient_id in IngredientInRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'ingredient_id'):
+            overlay[recipe_id].add(ingredient_id)
+        generation = bump_generation(self.label)[0]
+        with self._lock:
+            data = self._data
+            # Слой применим, только если между загрузкой индекса и этим
+            # изменением поколение не увеличивал другой процесс.
+            if (data is None or self._generation is None
+                    or generation != self._generation + 1
+                    or len(data.overlay) + len(overlay) > MAX_OVERLAY):
+                self._data = None
+                self._generation = None
+                return
+            data.overlay = {**data.overlay, **overlay}
+            self._generation = generation
+
+    def search(self, ingredient_ids, limit):
+        """
+        Рецепты по убыванию доли имеющихся ингредиентов.
+
+        Возвращает список словарей: recipe_id, coverage, matched, total
+        и missing - id недостающих ингредиентов.
+        """
+        data = self.get_data()
+        overlay = data.overlay
+        selected = set(ingredient_ids)
+        counts = data.match(selected, list(overlay))
+        found = np.flatnonzero(counts)
+        coverage = counts[found] / data.totals[found]
+        order = np.lexsort(
+            (-data.recipe_ids[found], -counts[found], -coverage)
+        )[:limit]
+        results = [
+            self.result(data.recipe_ids[position],
+                        data.recipe_ingredients(position), selected)
+            for position in found[order].tolist()
+        ]
+        results.extend(
+            self.result(recipe_id, ingredients, selected)
+            for recipe_id, ingredients in overlay.items()
+            if ingredients & selected
+        )
+        results.sort(key=lambda item: (item['coverage'], item['matched'],
+                                       item['recipe_id']), reverse=True)
+        return results[:limit]
+
+    @staticmethod
+    def result(recipe_id, ingredients, selected):
+        missing = [pk for pk in ingredients if pk not in selected]
+        matched = len(ingredients) - len(missing)
+        return {
+            'recipe_id': int(recipe_id),
+            'coverage': matched / len(ingredients),
+            'matched': matched,
+            'total': len(ingredients),
+            'missing': missing,
+        }
+
+
+recipe_ingredient_index = RecipeIngredientIndex()
@@ -0,0 +1,121 @@
+"""
+Модуль денормализованных счетчиков.
+
+Счетчики изменяются атомарно выражениями F() в обработчиках сигналов
+(см. recipes.signals) и пересчитываются целиком командой
+reconcile_counters. update() не отправляет сигналов, поэтому после
+фиксации изменений поколение кэша API модели увеличивается явно.
+"""
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from api.cache import bump_generation, model_label
+from users.models import FoodgramUser
+from .models import Favorite, Recipe, ShoppingList
+
+
+def bump_on_commit(model):
+    label = model_label(model)
+    transaction.on_commit(lambda: bump_generation(label))
+
+
+def change_counters(model, pks, field, delta):
+    """Атомарное изменение счетчика field у записей model из списка pks."""
+    model.objects.filter(pk__in=pks).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+    bump_on_commit(model)
+
+
+def change_counter(model, pk, field, delta):
+    change_counters(model, [pk], field, delta)
+
+
+def insert_user_recipes(model, user_id, recipe_ids):
+    """
+    Добавляет рецепты recipe_ids в список model пользователя.
+
+    Записи, уже созданные параллельным запросом, пропускаются
+    ON CONFLICT DO NOTHING; возвращаются id только вставленных рецептов,
+    чтобы счетчики изменились ровно на число новых записей.
+    """
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return []
+    quote = connection.ops.quote_name
+    sql = (
+        f'INSERT INTO {quote(model._meta.db_table)} (user_id, recipe_id) '
+        f'VALUES {", ".join(["(%s, %s)"] * len(recipe_ids))} '
+        'ON CONFLICT DO NOTHING RETURNING recipe_id'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [value for pk in recipe_ids
+                             for value in (user_id, pk)])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def reconcile(model, counters, pks=None):
+    """
+    Пересчет счетчиков записей model одним UPDATE ... FROM.
+
+    counters - поле счетчика: (модель ссылок, поле внешнего ключа).
+    Ссылки каждой модели считаются одним GROUP BY вместо подзапроса на
+    каждую запись; записи без ссылок получают 0. Перезаписываются только
+    строки с неверными значениями, их число и возвращается.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    pk = quote(model._meta.pk.column)
+    params = []
+    condition = ''
+    if pks is not None:
+        pks = list(pks)
+        if not pks:
+            return 0
+        condition = f'IN ({", ".join(["%s"] * len(pks))})'
+    joins, assignments, differences = [], [], []
+    for number, (field, (source, link)) in enumerate(counters.items()):
+        column = quote(model._meta.get_field(field).column)
+        link = quote(source._meta.get_field(link).column)
+        alias = f'counts{number}'
+        where = f'WHERE {link} {condition} ' if condition else ''
+        joins.append(
+            f'LEFT JOIN (SELECT {link} AS ref, COUNT(*) AS total '
+            f'FROM {quote(source._meta.db_table)} {where}'
+            f'GROUP BY {link}) {alias} ON {alias}.ref = target.{pk}'
+        )
+        if condition:
+            params.extend(pks)
+        value = f'COALESCE({alias}.total, 0)'
+        assignments.append(f'{column} = {value}')
+        differences.append(f'{table}.{column} <> {value}')
+    sql = (
+        f'UPDATE {table} SET {", ".join(assignments)} '
+        f'FROM {table} target {" ".join(joins)} '
+        f'WHERE {table}.{pk} = target.{pk} '
+        f'AND ({" OR ".join(differences)})'
+    )
+    if condition:
+        sql += f' AND target.{pk} {condition}'
+        params.extend(pks)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def reconcile_recipe_counters(recipe_ids=None):
+    """Пересчет счетчиков избранного и списков покупок рецептов."""
+    bump_on_commit(Recipe)
+    return reconcile(Recipe, {
+        'favorites_count': (Favorite, 'recipe'),
+        'in_carts_count': (ShoppingList, 'recipe'),
+    }, recipe_ids)
+
+
+def reconcile_recipes_count(author_ids=None):
+    """Пересчет количества рецептов авторов."""
+    bump_on_commit(FoodgramUser)
+    return reconcile(FoodgramUser, {
+        'recipes_count': (Recipe, 'author'),
+    }, author_ids)
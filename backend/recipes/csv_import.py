@@ -1,42 +1,168 @@
 """
-Модуль импорта ингредиентов из файла CSV.
+Модуль импорта ингредиентов из файлов CSV и JSON.
+
+Данные читаются потоково и записываются пачками: на PostgreSQL через
+COPY во временную таблицу с последующим INSERT ... ON CONFLICT, на
+остальных СУБД через bulk_create(ignore_conflicts=True).
 """
 import csv
+import io
+import json
 import os
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from api.cache import bump_generation, model_label
+from .catalogs import ingredient_index
 from .models import Ingredient
-from foodgram.settings import FOOD_DATA_ROOT
 
 FILENAME = 'ingredients.csv'
+CHUNK_SIZE = 1000
+FORMATS = ('csv', 'json', 'jsonl')
+TEMP_TABLE = 'ingredient_import'
+
+
+def read_csv(path):
+    """Построчное чтение CSV файла."""
+    with open(path, encoding='utf-8', newline='') as r_file:
+        for row in csv.reader(r_file, delimiter=','):
+            yield row
+
+
+def read_json(path):
+    """Чтение JSON файла со списком ингредиентов."""
+    with open(path, encoding='utf-8') as r_file:
+        for item in json.load(r_file):
+            yield [item.get('name', ''), item.get('measurement_unit', '')]
+
+
+def read_jsonl(path):
+    """Построчное чтение файла JSON Lines."""
+    with open(path, encoding='utf-8') as r_file:
+        for line in r_file:
+            if line.strip():
+                item = json.loads(line)
+                yield [item.get('name', ''),
+                       item.get('measurement_unit', '')]
+
+
+READERS = {'csv': read_csv, 'json': read_json, 'jsonl': read_jsonl}
+
+
+def detect_format(path):
+    """Определяет формат файла по расширению."""
+    ext = os.path.splitext(path)[1].lstrip('.').lower()
+    return ext if ext in FORMATS else 'csv'
+
+
+def chunked(rows, size):
+    """Разбивает поток строк на пачки заданного размера."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def clean_row(row):
+    """Возвращает пару (name, measurement_unit) или None для брака."""
+    if len(row) < 2:
+        return None
+    name, measurement_unit = row[0].strip(), row[1].strip()
+    if not name or not measurement_unit:
+        return None
+    return name, measurement_unit
+
+
+def bulk_insert(rows):
+    """Вставка пачки через ORM, возвращает число новых записей."""
+    existing = set(Ingredient.objects.filter(
+        name__in={name for name, _ in rows}
+    ).values_list('name', 'measurement_unit'))
+    new_rows = [row for row in rows if row not in existing]
+    Ingredient.objects.bulk_create(
+        [Ingredient(name=name, measurement_unit=measurement_unit)
+         for name, measurement_unit in new_rows],
+        ignore_conflicts=True
+    )
+    return len(new_rows)
+
+
+def copy_insert(cursor, rows):
+    """Вставка пачки через COPY, возвращает число новых записей."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.execute(f'TRUNCATE {TEMP_TABLE}')
+    cursor.copy_expert(
+        f'COPY {TEMP_TABLE} (name, measurement_unit) '
+        f'FROM STDIN WITH (FORMAT csv)',
+        buffer
+    )
+    table = connection.ops.quote_name(Ingredient._meta.db_table)
+    cursor.execute(
+        f'INSERT INTO {table} (name, measurement_unit) '
+        f'SELECT name, measurement_unit FROM {TEMP_TABLE} '
+        f'ON CONFLICT ON CONSTRAINT unique_ingredient DO NOTHING'
+    )
+    return cursor.rowcount
+
 
+def load_ingredients(path=None, fmt=None, chunk_size=CHUNK_SIZE,
+                     dry_run=False, use_copy=True, progress=None):
+    """
+    Загрузка справочника ингредиентов.
 
-def run_import_csv():
-    """Загрузка CSV файла"""
-    with open(os.path.join(FOOD_DATA_ROOT, FILENAME),
-              encoding='utf-8') as r_file:
-        # Создаем временный лог
-        with open(os.path.join(FOOD_DATA_ROOT, 'ingredients.log'), 'w') as f:
-            f.write('Создан!')
-        # Создаем объект reader, указываем символ-разделитель ","
-        file_reader = csv.reader(r_file, delimiter=",")
-        # Счетчики для подсчета количества строк
-        true_count = 0  # корректные данные
-        false_count = 0  # данные с ошибками
-        dub_count = 0  # повторяющиеся данные
-        # Считывание данных из CSV файла
-        for row in file_reader:
-            # Строки данных
-            if "" in row:
-                false_count += 1
-            else:
-                if Ingredient.objects.filter(
-                        name=row[0],
-                        measurement_unit=row[1]
-                ).exists():
-                    # Данные уже присутствуют в списке ингредиентов
-                    dub_count += 1
+    Возвращает счетчики: true - новые записи, false - записи с ошибками,
+    dub - дубликаты (в файле или в базе), а также время работы в секундах.
+    В режиме dry_run все изменения откатываются.
+    """
+    path = path or os.path.join(settings.FOOD_DATA_ROOT, FILENAME)
+    rows = READERS[fmt or detect_format(path)](path)
+    use_copy = use_copy and connection.vendor == 'postgresql'
+    results = {'true': 0, 'false': 0, 'dub': 0}
+    seen = set()
+    started = time.monotonic()
+    with transaction.atomic(), connection.cursor() as cursor:
+        if use_copy:
+            # Таблица могла остаться от предыдущей загрузки во внешней
+            # транзакции; copy_insert очищает ее перед каждой пачкой.
+            cursor.execute(
+                f'CREATE TEMP TABLE IF NOT EXISTS {TEMP_TABLE} '
+                f'(name varchar({settings.MAX_LENGTH_INGREDIENT}), '
+                f'measurement_unit '
+                f'varchar({settings.MAX_LENGTH_MEASUREMENT_UNIT})) '
+                f'ON COMMIT DROP'
+            )
+        for chunk in chunked(rows, chunk_size):
+            valid = []
+            for row in chunk:
+                row = clean_row(row)
+                if row is None:
+                    results['false'] += 1
+                elif row in seen:
+                    results['dub'] += 1
                 else:
-                    Ingredient.objects.create(
-                        name=row[0],
-                        measurement_unit=row[1]).save()
-                    true_count += 1
-    return {'true': true_count, 'false': false_count, 'dub': dub_count}
+                    seen.add(row)
+                    valid.append(row)
+            if valid:
+                inserted = (copy_insert(cursor, valid) if use_copy
+                            else bulk_insert(valid))
+                results['true'] += inserted
+                results['dub'] += len(valid) - inserted
+            if progress is not None:
+                progress(results)
+        if dry_run:
+            transaction.set_rollback(True)
+        else:
+            # bulk_create и COPY не отправляют сигналы моделей.
+            transaction.on_commit(ingredient_index.invalidate)
+            transaction.on_commit(
+                lambda: bump_generation(model_label(Ingredient))
+            )
+    results['seconds'] = time.monotonic() - started
+    return results
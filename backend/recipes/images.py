@@ -0,0 +1,97 @@
+"""
+Модуль обработки изображений рецептов.
+
+Оригинал сохраняется под именем из SHA-256 содержимого, поэтому повторная
+загрузка того же файла не создает копию на диске. Для каждого нового
+оригинала создаются уменьшенные варианты в форматах JPEG и WebP:
+<hash>_card.jpg, <hash>_card.webp, <hash>_detail.jpg, <hash>_detail.webp.
+WebP создается, только если Pillow собран с его поддержкой; иначе
+вместо WebP отдается JPEG.
+"""
+import hashlib
+import os
+import re
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+from PIL import Image, ImageOps, features
+
+# Вариант: максимальные ширина и высота.
+VARIANTS = {
+    'card': (480, 480),
+    'detail': (1200, 1200),
+}
+FORMATS = {'jpg': 'JPEG'}
+if features.check('webp'):
+    FORMATS['webp'] = 'WEBP'
+QUALITY = 85
+HASH_NAME = re.compile(r'^[0-9a-f]{64}\.\w+$')
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_processed(name):
+    """Сохранен ли файл под хэш-именем, то есть с вариантами."""
+    return bool(name) and bool(HASH_NAME.match(os.path.basename(name)))
+
+
+def variant_name(name, variant, ext='jpg'):
+    if ext not in FORMATS:
+        ext = 'jpg'
+    root, _ = os.path.splitext(name)
+    return f'{root}_{variant}.{ext}'
+
+
+def render_variant(image, size, fmt):
+    variant = image.copy()
+    variant.thumbnail(size)
+    if fmt == 'JPEG' and variant.mode != 'RGB':
+        variant = variant.convert('RGB')
+    buffer = BytesIO()
+    variant.save(buffer, fmt, quality=QUALITY)
+    return ContentFile(buffer.getvalue())
+
+
+@deconstructible
+class RecipeImageStorage(FileSystemStorage):
+    """Файловое хранилище с адресацией по содержимому и вариантами."""
+
+    def hashed_name(self, name, content):
+        """Имя, под которым будет сохранено содержимое content."""
+        ext = os.path.splitext(name)[1].lower()
+        return os.path.join(os.path.dirname(name),
+                            content_hash(content) + ext)
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        if not self.exists(name):
+            name = super()._save(name, content)
+        # Варианты досоздаются и для уже сохраненного оригинала: прошлая
+        # загрузка могла прерваться до их записи.
+        self.save_variants(name)
+        return name
+
+    def save_variants(self, name):
+        """Создает недостающие варианты изображения name."""
+        with self.open(name) as file, Image.open(file) as original:
+            image = ImageOps.exif_transpose(original)
+            for variant, size in VARIANTS.items():
+                for ext, fmt in FORMATS.items():
+                    target = variant_name(name, variant, ext)
+                    if not self.exists(target):
+                        super()._save(target,
+                                      render_variant(image, size, fmt))
+
+    def delete_with_variants(self, name):
+        """Удаляет оригинал name вместе со всеми его вариантами."""
+        for variant in VARIANTS:
+            for ext in FORMATS:
+                self.delete(variant_name(name, variant, ext))
+        self.delete(name)
@@ -0,0 +1,216 @@
+"""
+Модуль переноса рецептов между окружениями в формате JSON Lines.
+
+Каждая строка файла - один рецепт:
+{"author": "<email>", "name": "...", "text": "...", "cooking_time": 10,
+ "image": "<имя файла>", "tags": ["<slug>", ...],
+ "ingredients": [{"name": "...", "measurement_unit": "...",
+                  "amount": 100}, ...]}
+Файлы изображений лежат рядом, в отдельном каталоге.
+"""
+import json
+import os
+import shutil
+from itertools import islice
+
+from django.core.files import File
+from django.db import transaction
+from api.cache import bump_generation, model_label
+from users.models import FoodgramUser
+from .cookable import recipe_ingredient_index
+from .counters import reconcile_recipes_count
+from .models import Ingredient, IngredientInRecipe, Recipe, Tag
+from .search import update_search_vectors
+
+CHUNK_SIZE = 500
+IMAGE_DIR = 'recipes/images/'
+
+
+def recipe_to_dict(recipe):
+    return {
+        'author': recipe.author.email,
+        'name': recipe.name,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'image': os.path.basename(recipe.image.name),
+        'tags': [tag.slug for tag in recipe.tags.all()],
+        'ingredients': [
+            {'name': item.ingredient.name,
+             'measurement_unit': item.ingredient.measurement_unit,
+             'amount': item.amount}
+            for item in recipe.ingredients_in_recipes.all()
+        ],
+    }
+
+
+def copy_image(recipe, images_dir):
+    target = os.path.join(images_dir, os.path.basename(recipe.image.name))
+    if os.path.exists(target):
+        return
+    with recipe.image.storage.open(recipe.image.name) as source, \
+            open(target, 'wb') as destination:
+        shutil.copyfileobj(source, destination)
+
+
+def export_recipes(stream, images_dir, chunk_size=CHUNK_SIZE):
+    """Выгрузка всех рецептов пачками по возрастанию id."""
+    os.makedirs(images_dir, exist_ok=True)
+    exported = 0
+    last_pk = 0
+    while True:
+        chunk = list(Recipe.objects.with_related().filter(
+            pk__gt=last_pk
+        ).order_by('pk')[:chunk_size])
+        if not chunk:
+            return exported
+        for recipe in chunk:
+            stream.write(json.dumps(recipe_to_dict(recipe),
+                                    ensure_ascii=False) + '\n')
+            if recipe.image:
+                copy_image(recipe, images_dir)
+        exported += len(chunk)
+        last_pk = chunk[-1].pk
+
+
+class RecipeImporter:
+    """
+    Загрузка рецептов из JSON Lines.
+
+    Авторы, теги и ингредиенты ищутся по словарям, загруженным один раз;
+    рецепты, теги и ингредиенты рецептов вставляются bulk_create,
+    каждая пачка фиксируется отдельной транзакцией.
+    """
+
+    def __init__(self, images_dir, chunk_size=CHUNK_SIZE):
+        self.images_dir = images_dir
+        self.chunk_size = chunk_size
+        self.authors = dict(FoodgramUser.objects.values_list('email', 'id'))
+        self.tags = dict(Tag.objects.values_list('slug', 'id'))
+        self.ingredients = {
+            (name, unit): pk for name, unit, pk in
+            Ingredient.objects.values_list('name', 'measurement_unit', 'id')
+        }
+        self.existing = set(Recipe.objects.values_list('author_id', 'name'))
+        self.images = {}
+        self.stored = []
+        self.storage = Recipe._meta.get_field('image').storage
+        self.results = {'created': 0, 'skipped': 0, 'errors': []}
+
+    def store_image(self, filename):
+        """
+        Сохраняет файл изображения в хранилище один раз за загрузку.
+
+        Имена файлов, которых до загрузки в хранилище не было, копятся
+        в self.stored до фиксации пачки: если она не сохранится,
+        они будут удалены.
+        """
+        if filename not in self.images:
+            with open(os.path.join(self.images_dir, filename), 'rb') as file:
+                content = File(file)
+                name = IMAGE_DIR + filename
+                is_new = not self.storage.exists(
+                    self.storage.hashed_name(name, content)
+                )
+                self.images[filename] = self.storage.save(name, content)
+            if is_new:
+                self.stored.append(filename)
+        return self.images[filename]
+
+    def discard_images(self):
+        """Удаляет изображения, сохраненные для незафиксированной пачки."""
+        names = {self.images[filename] for filename in self.stored}
+        for name in names:
+            self.storage.delete_with_variants(name)
+        # Файлы с тем же содержимым указывают на удаленные имена.
+        self.images = {filename: name for filename, name
+                       in self.images.items() if name not in names}
+        self.stored = []
+
+    def resolve(self, data):
+        """Переводит запись файла в объекты для вставки."""
+        author_id = self.authors[data['author']]
+        tag_ids = {self.tags[slug] for slug in data['tags']}
+        ingredients = {
+            self.ingredients[(item['name'], item['measurement_unit'])]:
+                int(item['amount'])
+            for item in data['ingredients']
+        }
+        cooking_time = int(data['cooking_time'])
+        if cooking_time <= 0 or min(ingredients.values(), default=0) <= 0:
+            raise ValueError('время и количество должны быть больше нуля')
+        recipe = Recipe(author_id=author_id, name=data['name'],
+                        text=data['text'], cooking_time=cooking_time,
+                        image=self.store_image(data['image']))
+        return recipe, tag_ids, ingredients
+
+    def parse(self, number, line):
+        try:
+            data = json.loads(line)
+            if (self.authors.get(data['author']), data['name']) in \
+                    self.existing:
+                self.results['skipped'] += 1
+                return None
+            return self.resolve(data)
+        except (KeyError, TypeError, ValueError, OSError) as error:
+            self.results['errors'].append(f'строка {number}: {error!r}')
+            return None
+
+    @transaction.atomic
+    def save_chunk(self, rows):
+        recipes = Recipe.objects.bulk_create([row[0] for row in rows])
+        if any(recipe.pk is None for recipe in recipes):
+            # Не все СУБД возвращают ключи из bulk_create.
+            ids = {
+                (author_id, name): pk for pk, author_id, name in
+                Recipe.objects.filter(
+                    author_id__in={recipe.author_id for recipe in recipes},
+                    name__in={recipe.name for recipe in recipes}
+                ).values_list('id', 'author_id', 'name')
+            }
+            for recipe in recipes:
+                recipe.pk = ids[(recipe.author_id, recipe.name)]
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+            for recipe, (_, tag_ids, _) in zip(recipes, rows)
+            for tag_id in tag_ids
+        ])
+        IngredientInRecipe.objects.bulk_create([
+            IngredientInRecipe(recipe_id=recipe.pk, ingredient_id=pk,
+                               amount=amount)
+            for recipe, (_, _, ingredients) in zip(recipes, rows)
+            for pk, amount in ingredients.items()
+        ])
+        recipe_ids = [recipe.pk for recipe in recipes]
+        update_search_vectors(recipe_ids)
+        transaction.on_commit(
+            lambda: recipe_ingredient_index.refresh(recipe_ids)
+        )
+
+    def run(self, stream, progress=None):
+        lines = enumerate(stream, 1)
+        author_ids = set()
+        while True:
+            chunk = list(islice(lines, self.chunk_size))
+            if not chunk:
+                break
+            rows = []
+            for number, line in chunk:
+                row = self.parse(number, line) if line.strip() else None
+                if row is not None:
+                    self.existing.add((row[0].author_id, row[0].name))
+                    rows.append(row)
+            if rows:
+                try:
+                    self.save_chunk(rows)
+                except Exception:
+                    self.discard_images()
+                    raise
+                self.results['created'] += len(rows)
+                author_ids.update(row[0].author_id for row in rows)
+            self.stored = []
+            if progress is not None:
+                progress(self.results)
+        # bulk_create не отправляет сигналы моделей.
+        reconcile_recipes_count(author_ids)
+        bump_generation(model_label(Recipe))
+        return self.results
@@ -0,0 +1,34 @@
+"""Команда расчета похожих рецептов."""
+import time
+
+from django.core.management.base import BaseCommand
+from recipes.recommendations import (CART_WEIGHT, CHUNK_SIZE, TOP_K,
+                                     build_recommendations)
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает похожие рецепты по совместному добавлению '
+            'в избранное.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K,
+                            help='Похожих рецептов на один рецепт.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Рецептов в одном блоке расчета.')
+        parser.add_argument('--with-cart', action='store_true',
+                            help='Учитывать списки покупок.')
+        parser.add_argument('--cart-weight', type=float, default=CART_WEIGHT,
+                            help='Вес рецепта из списка покупок.')
+        parser.add_argument('--min-score', type=float, default=0,
+                            help='Минимальное сходство.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        created = build_recommendations(
+            options['top_k'], options['chunk_size'], options['with_cart'],
+            options['cart_weight'], options['min_score']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Записано пар: {created}. '
+            f'Время: {time.monotonic() - started:.2f} с.'
+        ))
@@ -0,0 +1,35 @@
+"""Команда выгрузки рецептов в JSON Lines."""
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from recipes.jsonl_transfer import CHUNK_SIZE, export_recipes
+
+
+class Command(BaseCommand):
+    help = 'Выгружает рецепты в файл JSON Lines, изображения - в каталог.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл для выгрузки.')
+        parser.add_argument(
+            '--images-dir',
+            help='Каталог изображений, по умолчанию <файл>_images.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Количество рецептов, читаемых одним запросом.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        images_dir = (options['images_dir']
+                      or os.path.splitext(path)[0] + '_images')
+        started = time.monotonic()
+        os.makedirs(os.path.dirname(path) or os.curdir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as stream:
+            exported = export_recipes(stream, images_dir,
+                                      options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено рецептов: {exported}. '
+            f'Время: {time.monotonic() - started:.2f} с.'
+        ))
@@ -0,0 +1,53 @@
+"""Команда загрузки рецептов из JSON Lines."""
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from recipes.jsonl_transfer import CHUNK_SIZE, RecipeImporter
+
+
+class Command(BaseCommand):
+    help = ('Загружает рецепты из файла JSON Lines. Авторы, теги и '
+            'ингредиенты должны уже существовать.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл JSON Lines.')
+        parser.add_argument(
+            '--images-dir',
+            help='Каталог изображений, по умолчанию <файл>_images.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Количество рецептов в одной транзакции.'
+        )
+
+    def report_progress(self, results):
+        self.stdout.write(f'Загружено рецептов: {results["created"]}')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'Файл {path} не найден.')
+        if options['chunk_size'] <= 0:
+            raise CommandError('Размер пачки должен быть больше нуля.')
+        images_dir = (options['images_dir']
+                      or os.path.splitext(path)[0] + '_images')
+        started = time.monotonic()
+        importer = RecipeImporter(images_dir, options['chunk_size'])
+        with open(path, encoding='utf-8') as stream:
+            results = importer.run(
+                stream,
+                progress=self.report_progress if options['verbosity'] > 0
+                else None
+            )
+        elapsed = time.monotonic() - started
+        for error in results['errors']:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: {results["created"]}, '
+            f'пропущено существующих: {results["skipped"]}, '
+            f'с ошибками: {len(results["errors"])}. '
+            f'Время: {elapsed:.2f} с, '
+            f'{results["created"] / elapsed if elapsed else 0:.0f} '
+            f'рецептов/с.'
+        ))
@@ -0,0 +1,62 @@
+"""Команда загрузки справочника ингредиентов."""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from recipes.csv_import import (CHUNK_SIZE, FILENAME, FORMATS,
+                                load_ingredients)
+
+
+class Command(BaseCommand):
+    help = 'Загружает справочник ингредиентов из файла CSV, JSON или JSONL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            default=os.path.join(settings.FOOD_DATA_ROOT, FILENAME),
+            help='Путь к файлу с ингредиентами.'
+        )
+        parser.add_argument(
+            '--format', dest='fmt', choices=FORMATS,
+            help='Формат файла, по умолчанию определяется по расширению.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Количество строк в одной пачке.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Проверить файл без сохранения изменений.'
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY на PostgreSQL.'
+        )
+
+    def report_progress(self, results):
+        processed = results['true'] + results['false'] + results['dub']
+        self.stdout.write(f'Обработано строк: {processed}')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'Файл {path} не найден.')
+        if options['chunk_size'] <= 0:
+            raise CommandError('Размер пачки должен быть больше нуля.')
+        results = load_ingredients(
+            path,
+            fmt=options['fmt'],
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+            use_copy=not options['no_copy'],
+            progress=self.report_progress if options['verbosity'] > 0
+            else None
+        )
+        if options['dry_run']:
+            self.stdout.write('Пробный запуск: изменения не сохранены.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Новых записей: {results["true"]}, '
+            f'с ошибками: {results["false"]}, '
+            f'дубликатов: {results["dub"]}. '
+            f'Время: {results["seconds"]:.2f} с.'
+        ))
@@ -0,0 +1,50 @@
+"""Команда обработки ранее загруженных изображений рецептов."""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.cache import bump_generation, model_label
+from recipes.images import is_processed
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Переименовывает изображения рецептов по хэшу содержимого '
+            'и создает недостающие уменьшенные варианты.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete-originals', action='store_true',
+            help='Удалить исходные файлы после переименования.'
+        )
+
+    def process(self, recipe, delete_originals):
+        """Возвращает True, если имя файла рецепта изменилось."""
+        image = recipe.image
+        storage = image.storage
+        if is_processed(image.name):
+            storage.save_variants(image.name)
+            return False
+        with storage.open(image.name) as original:
+            name = storage.save(image.name, original)
+        Recipe.objects.filter(pk=recipe.pk).update(
+            image=name, updated_at=timezone.now()
+        )
+        if delete_originals:
+            storage.delete(image.name)
+        return True
+
+    def handle(self, *args, **options):
+        renamed = processed = missing = 0
+        recipes = Recipe.objects.exclude(image='').only('id', 'image')
+        for recipe in recipes.iterator():
+            if not recipe.image.storage.exists(recipe.image.name):
+                missing += 1
+                self.stderr.write(f'Нет файла {recipe.image.name} '
+                                  f'для рецепта {recipe.pk}.')
+                continue
+            renamed += self.process(recipe, options['delete_originals'])
+            processed += 1
+        bump_generation(model_label(Recipe))
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано: {processed}, переименовано: {renamed}, '
+            f'без файла: {missing}.'
+        ))
@@ -0,0 +1,23 @@
+"""Команда пересчета итогов списков покупок."""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.cart import rebuild_cart_totals
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает итоги списков покупок пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, nargs='*',
+                            help='id пользователей; по умолчанию все.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with transaction.atomic():
+            created = rebuild_cart_totals(options['users'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Записано строк: {created}. '
+            f'Время: {time.monotonic() - started:.2f} с.'
+        ))
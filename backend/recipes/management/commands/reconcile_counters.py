@@ -0,0 +1,22 @@
+"""Команда пересчета денормализованных счетчиков."""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.counters import (reconcile_recipe_counters,
+                              reconcile_recipes_count)
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счетчики избранного, списков покупок '
+            'и рецептов авторов.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with transaction.atomic():
+            recipes = reconcile_recipe_counters()
+            authors = reconcile_recipes_count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено рецептов: {recipes}, авторов: {authors}. '
+            f'Время: {time.monotonic() - started:.2f} с.'
+        ))
@@ -0,0 +1,32 @@
+"""Команда генерации синтетических данных для нагрузочного тестирования."""
+import time
+
+from django.core.management.base import BaseCommand
+from recipes.seeding import CHUNK_SIZE, PASSWORD, PREFIX, BenchmarkSeeder
+
+
+class Command(BaseCommand):
+    help = ('Создает пользователей, рецепты, избранное, списки покупок '
+            'и подписки со скошенным распределением.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Количество новых пользователей.')
+        parser.add_argument('--recipes', type=int, default=10000,
+                            help='Количество новых рецептов.')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Начальное значение генератора.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Размер пачки записей.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        seeder = BenchmarkSeeder(options['seed'], options['chunk_size'])
+        results = seeder.run(options['users'], options['recipes'])
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{key}: {value}' for key, value in results.items())
+            + f'. Время: {time.monotonic() - started:.2f} с.'
+        ))
+        self.stdout.write(
+            f'Пользователи: {PREFIX}<N>@example.com, пароль {PASSWORD}'
+        )
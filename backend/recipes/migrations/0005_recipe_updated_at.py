@@ -0,0 +1,20 @@
+# Generated by Django 3.2.3 on 2026-10-18 11:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Обновляется при изменении рецепта, его тегов и ингредиентов', verbose_name='Дата изменения'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.3 on 2026-10-18 12:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Favorite = apps.get_model('recipes', 'Favorite')
+    ShoppingList = apps.get_model('recipes', 'ShoppingList')
+
+    def count_subquery(model):
+        return Coalesce(Subquery(
+            model.objects.filter(recipe=OuterRef('pk')).order_by().values(
+                'recipe').annotate(total=Count('pk')).values('total')
+        ), 0)
+
+    Recipe.objects.update(favorites_count=count_subquery(Favorite),
+                          in_carts_count=count_subquery(ShoppingList))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Счётчик избранного'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Счётчик списков покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
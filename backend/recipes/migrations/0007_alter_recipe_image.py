@@ -0,0 +1,19 @@
+# Generated by Django 3.2.3 on 2026-10-18 13:40
+
+from django.db import migrations, models
+import recipes.images
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(default=None, help_text='Выберите иллюстрацию для рецепта', storage=recipes.images.RecipeImageStorage(), upload_to='recipes/images/', verbose_name='Картинка'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.2.3 on 2026-10-18 15:02
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# Индексы, которые нельзя описать в Meta моделей: таблица связи тегов
+# создается автоматически, а индекс по выражению с классом операторов
+# поддерживается Django только начиная с версии 4.0.
+POSTGRES_INDEXES = (
+    ('recipe_tags_tag_recipe_idx',
+     'CREATE INDEX IF NOT EXISTS recipe_tags_tag_recipe_idx '
+     'ON recipes_recipe_tags (tag_id, recipe_id)'),
+    ('ingredient_name_trgm_idx',
+     'CREATE INDEX IF NOT EXISTS ingredient_name_trgm_idx '
+     'ON recipes_ingredient USING gin (UPPER(name::text) gin_trgm_ops)'),
+)
+
+
+def create_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _, sql in POSTGRES_INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in POSTGRES_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_alter_recipe_image'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingredientinrecipe',
+            index=models.Index(fields=['recipe'], include=('ingredient', 'amount'), name='ingredient_recipe_covering_idx'),
+        ),
+        migrations.RunPython(create_postgres_indexes, drop_postgres_indexes),
+    ]
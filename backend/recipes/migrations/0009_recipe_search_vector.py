@@ -0,0 +1,51 @@
+# Generated by Django 3.2.3 on 2026-10-18 17:40
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Индекс GIN и заполнение вектора доступны только на PostgreSQL.
+CREATE_INDEX = (
+    'CREATE INDEX IF NOT EXISTS recipe_search_vector_idx '
+    'ON recipes_recipe USING gin (search_vector)'
+)
+FILL_VECTORS = """
+UPDATE recipes_recipe SET search_vector =
+    setweight(to_tsvector('russian', coalesce(name, '')), 'A')
+    || setweight(to_tsvector('russian', coalesce((
+        SELECT string_agg(ingredient.name, ' ')
+        FROM recipes_ingredientinrecipe item
+        JOIN recipes_ingredient ingredient
+            ON ingredient.id = item.ingredient_id
+        WHERE item.recipe_id = recipes_recipe.id
+    ), '')), 'B')
+    || setweight(to_tsvector('russian', coalesce(text, '')), 'C')
+"""
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_INDEX)
+    schema_editor.execute(FILL_VECTORS)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS recipe_search_vector_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_index_pack'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
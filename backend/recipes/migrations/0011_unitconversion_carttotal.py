@@ -0,0 +1,93 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:30
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Единицы из data/ingredients.csv, сводимые к общей базовой единице.
+CONVERSIONS = (
+    ('г', 'г', Decimal(1)),
+    ('кг', 'г', Decimal(1000)),
+    ('мл', 'мл', Decimal(1)),
+    ('л', 'мл', Decimal(1000)),
+)
+
+
+def add_conversions(apps, schema_editor):
+    UnitConversion = apps.get_model('recipes', 'UnitConversion')
+    UnitConversion.objects.bulk_create([
+        UnitConversion(unit=unit, base_unit=base_unit, factor=factor)
+        for unit, base_unit, factor in CONVERSIONS
+    ])
+
+
+def fill_cart_totals(apps, schema_editor):
+    ShoppingList = apps.get_model('recipes', 'ShoppingList')
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+    CartTotal = apps.get_model('recipes', 'CartTotal')
+    conversions = {unit: (base_unit, factor)
+                   for unit, base_unit, factor in CONVERSIONS}
+    carts = {}
+    for user_id, recipe_id in ShoppingList.objects.values_list(
+            'user_id', 'recipe_id'):
+        carts.setdefault(recipe_id, []).append(user_id)
+    totals = {}
+    for recipe_id, name, unit, amount in IngredientInRecipe.objects.filter(
+            recipe_id__in=list(carts)).values_list(
+            'recipe_id', 'ingredient__name',
+            'ingredient__measurement_unit', 'amount'):
+        base_unit, factor = conversions.get(unit, (unit, Decimal(1)))
+        for user_id in carts[recipe_id]:
+            key = (user_id, name, base_unit)
+            totals[key] = totals.get(key, 0) + amount * factor
+    CartTotal.objects.bulk_create([
+        CartTotal(user_id=user_id, name=name, unit=unit, amount=amount)
+        for (user_id, name, unit), amount in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0010_recipesimilarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnitConversion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unit', models.CharField(max_length=200, unique=True, verbose_name='Единица измерения')),
+                ('base_unit', models.CharField(max_length=200, verbose_name='Базовая единица')),
+                ('factor', models.DecimalField(decimal_places=3, max_digits=12, verbose_name='Множитель')),
+            ],
+            options={
+                'verbose_name': 'Пересчет единиц',
+                'verbose_name_plural': 'Пересчет единиц',
+                'ordering': ('unit',),
+            },
+        ),
+        migrations.CreateModel(
+            name='CartTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Ингредиент')),
+                ('unit', models.CharField(max_length=200, verbose_name='Единица измерения')),
+                ('amount', models.DecimalField(decimal_places=3, max_digits=15, verbose_name='Количество')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_totals', to=settings.AUTH_USER_MODEL, verbose_name='Покупатель')),
+            ],
+            options={
+                'verbose_name': 'Итог списка покупок',
+                'verbose_name_plural': 'Итоги списков покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='carttotal',
+            constraint=models.UniqueConstraint(fields=('user', 'name', 'unit'), name='unique_cart_total'),
+        ),
+        migrations.RunPython(add_conversions, migrations.RunPython.noop),
+        migrations.RunPython(fill_cart_totals, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,13 @@
 """Модуль управления моделями приложения recipe (Рецепты)."""
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 from api.validators import (model_validate_minutes, model_validate_qty,
                             model_validate_slug)
-from users.models import FoodgramUser
+from users.models import FoodgramUser, Subscription
+from .images import RecipeImageStorage
 
 
 class Tag(models.Model):
@@ -74,6 +78,64 @@ class Ingredient(models.Model):
         return f'{self.name} {self.measurement_unit}'
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Набор запросов рецептов с подготовкой данных для API."""
+
+    def with_related(self):
+        """Подгружает автора, теги и ингредиенты без запросов на рецепт."""
+        return self.select_related('author').prefetch_related(
+            'tags',
+            models.Prefetch(
+                'ingredients_in_recipes',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                )
+            )
+        )
+
+    def with_user_flags(self, user):
+        """Аннотирует признаки избранного, корзины и подписки на автора."""
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=models.Value(
+                    False, output_field=models.BooleanField()),
+                is_in_shopping_cart=models.Value(
+                    False, output_field=models.BooleanField()),
+                author_is_subscribed=models.Value(
+                    False, output_field=models.BooleanField()),
+            )
+        return self.annotate(
+            is_favorited=models.Exists(Favorite.objects.filter(
+                user=user, recipe=models.OuterRef('pk'))),
+            is_in_shopping_cart=models.Exists(ShoppingList.objects.filter(
+                user=user, recipe=models.OuterRef('pk'))),
+            author_is_subscribed=models.Exists(Subscription.objects.filter(
+                user=user, author=models.OuterRef('author'))),
+        )
+
+    def newest_per_author(self, author_ids, limit=None):
+        """Не более limit свежих рецептов каждого из авторов."""
+        recipes = self.filter(author_id__in=author_ids)
+        if limit is None:
+            return recipes
+        # Django 3.2 не умеет фильтровать по оконной функции, поэтому
+        # нумерация ROW_NUMBER() оборачивается в подзапрос.
+        ranked = recipes.annotate(
+            author_rank=models.Window(
+                expression=RowNumber(),
+                partition_by=[models.F('author_id')],
+                order_by=[models.F('pub_date').desc(),
+                          models.F('id').desc()]
+            )
+        ).order_by().values('id', 'author_rank')
+        sql, params = ranked.query.sql_with_params()
+        return self.filter(pk__in=RawSQL(
+            f'SELECT ranked.id FROM ({sql}) ranked '
+            f'WHERE ranked.author_rank <= %s',
+            (*params, limit)
+        ))
+
+
 class Recipe(models.Model):
     """Класс управления данными рецепта."""
 
@@ -92,6 +154,7 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         upload_to='recipes/images/',
+        storage=RecipeImageStorage(),
         blank=False,
         verbose_name='Картинка',
         help_text='Выберите иллюстрацию для рецепта',
@@ -127,18 +190,52 @@ class Recipe(models.Model):
         help_text='Дата публикации присваивается автоматически',
         blank=False
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+        help_text='Обновляется при изменении рецепта, его тегов '
+                  'и ингредиентов'
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Счётчик избранного'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Счётчик списков покупок'
+    )
+    # Поддерживается сигналами (см. recipes.search), только PostgreSQL.
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор'
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         default_related_name = 'recipes'
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'name'],
                 name='unique_author_name'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -180,6 +277,14 @@ class IngredientInRecipe(models.Model):
                 name='unique_ingredient_in_recipe'
             )
         ]
+        indexes = [
+            # Покрывающий индекс для prefetch ингредиентов и сводки корзины.
+            models.Index(
+                fields=['recipe'],
+                include=['ingredient', 'amount'],
+                name='ingredient_recipe_covering_idx'
+            ),
+        ]
 
     def __str__(self):
         return (
@@ -250,3 +355,121 @@ class ShoppingList(models.Model):
 
     def __str__(self):
         return f'{self.user} выбрал {self.recipe} для закупки.'
+
+
+class RecipeSimilarity(models.Model):
+    """
+    Класс хранения похожих рецептов.
+
+    Таблица заполняется целиком командой build_recommendations по
+    совместному добавлению рецептов в избранное.
+    """
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similarities',
+        verbose_name='Рецепт'
+    )
+
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожий рецепт'
+    )
+
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_recipe_similarity'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'],
+                name='recipe_similarity_score_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} похож на {self.similar}'
+
+
+class UnitConversion(models.Model):
+    """
+    Класс пересчета единиц измерения.
+
+    Количество в единице unit умножается на factor и суммируется
+    в единице base_unit. Единицы без записи в таблице не пересчитываются.
+    """
+
+    unit = models.CharField(
+        max_length=settings.MAX_LENGTH_MEASUREMENT_UNIT,
+        verbose_name='Единица измерения',
+        unique=True
+    )
+    base_unit = models.CharField(
+        max_length=settings.MAX_LENGTH_MEASUREMENT_UNIT,
+        verbose_name='Базовая единица'
+    )
+    factor = models.DecimalField(
+        max_digits=12,
+        decimal_places=3,
+        verbose_name='Множитель'
+    )
+
+    class Meta:
+        verbose_name = 'Пересчет единиц'
+        verbose_name_plural = 'Пересчет единиц'
+        ordering = ('unit',)
+
+    def __str__(self):
+        return f'1 {self.unit} = {self.factor} {self.base_unit}'
+
+
+class CartTotal(models.Model):
+    """
+    Класс итогов списка покупок пользователя.
+
+    Строка - ингредиент в базовой единице измерения. Таблица обновляется
+    при изменении списка покупок (см. recipes.cart).
+    """
+
+    user = models.ForeignKey(
+        FoodgramUser,
+        on_delete=models.CASCADE,
+        related_name='cart_totals',
+        verbose_name='Покупатель'
+    )
+    name = models.CharField(
+        max_length=settings.MAX_LENGTH_INGREDIENT,
+        verbose_name='Ингредиент'
+    )
+    unit = models.CharField(
+        max_length=settings.MAX_LENGTH_MEASUREMENT_UNIT,
+        verbose_name='Единица измерения'
+    )
+    amount = models.DecimalField(
+        max_digits=15,
+        decimal_places=3,
+        verbose_name='Количество'
+    )
+
+    class Meta:
+        verbose_name = 'Итог списка покупок'
+        verbose_name_plural = 'Итоги списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name', 'unit'],
+                name='unique_cart_total'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user}: {self.name}, {self.amount} {self.unit}'
@@ -0,0 +1,96 @@
+"""
+Модуль расчета похожих рецептов.
+
+Избранное (и при необходимости списки покупок) образует разреженную
+матрицу пользователь x рецепт. Сходство рецептов - косинус между
+столбцами матрицы; оно считается блоками строк матрицы X.T @ X, от
+каждой строки остаются top_k лучших значений, поэтому память
+ограничена размером блока. Результат целиком заменяет содержимое
+таблицы RecipeSimilarity.
+"""
+import numpy as np
+from django.db import transaction
+from scipy import sparse
+
+from .csv_import import chunked
+from .models import Favorite, RecipeSimilarity, ShoppingList
+
+TOP_K = 20
+CHUNK_SIZE = 1000
+CART_WEIGHT = 0.5
+INSERT_SIZE = 5000
+
+
+def load_pairs(model):
+    """Пары (пользователь, рецепт) модели в виде массива n x 2."""
+    return np.fromiter(
+        (value for pair in model.objects.values_list(
+            'user_id', 'recipe_id'
+        ).iterator() for value in pair),
+        dtype=np.int64
+    ).reshape(-1, 2)
+
+
+def build_matrix(with_cart=False, cart_weight=CART_WEIGHT):
+    """
+    Нормированная по столбцам матрица пользователь x рецепт.
+
+    Возвращает матрицу CSC и массив id рецептов, соответствующих столбцам.
+    """
+    pairs = [load_pairs(Favorite)]
+    weights = [np.ones(len(pairs[0]))]
+    if with_cart:
+        pairs.append(load_pairs(ShoppingList))
+        weights.append(np.full(len(pairs[1]), cart_weight))
+    pairs = np.concatenate(pairs)
+    if not len(pairs):
+        return sparse.csc_matrix((0, 0)), np.empty(0, dtype=np.int64)
+    _, users = np.unique(pairs[:, 0], return_inverse=True)
+    recipe_ids, recipes = np.unique(pairs[:, 1], return_inverse=True)
+    # Повторы (избранное и корзина) суммируются.
+    matrix = sparse.csr_matrix(
+        (np.concatenate(weights), (users, recipes)),
+        shape=(users.max() + 1, len(recipe_ids))
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1
+    return (matrix @ sparse.diags(1 / norms)).tocsc(), recipe_ids
+
+
+def top_similar(matrix, recipe_ids, top_k=TOP_K, chunk_size=CHUNK_SIZE,
+                min_score=0):
+    """Генератор троек (рецепт, похожий рецепт, сходство)."""
+    transposed = matrix.T.tocsr()
+    for start in range(0, matrix.shape[1], chunk_size):
+        block = (transposed[start:start + chunk_size] @ matrix).tocsr()
+        for row in range(block.shape[0]):
+            begin, end = block.indptr[row], block.indptr[row + 1]
+            columns = block.indices[begin:end]
+            scores = block.data[begin:end]
+            keep = (columns != start + row) & (scores > min_score)
+            columns, scores = columns[keep], scores[keep]
+            if len(scores) > top_k:
+                best = np.argpartition(-scores, top_k)[:top_k]
+                columns, scores = columns[best], scores[best]
+            recipe_id = int(recipe_ids[start + row])
+            for column, score in zip(columns.tolist(), scores.tolist()):
+                yield recipe_id, int(recipe_ids[column]), score
+
+
+@transaction.atomic
+def build_recommendations(top_k=TOP_K, chunk_size=CHUNK_SIZE,
+                          with_cart=False, cart_weight=CART_WEIGHT,
+                          min_score=0):
+    """Пересчет таблицы похожих рецептов, возвращает число записей."""
+    matrix, recipe_ids = build_matrix(with_cart, cart_weight)
+    RecipeSimilarity.objects.all().delete()
+    created = 0
+    rows = top_similar(matrix, recipe_ids, top_k, chunk_size, min_score)
+    for chunk in chunked(rows, INSERT_SIZE):
+        RecipeSimilarity.objects.bulk_create([
+            RecipeSimilarity(recipe_id=recipe_id, similar_id=similar_id,
+                             score=score)
+            for recipe_id, similar_id, score in chunk
+        ])
+        created += len(chunk)
+    return created
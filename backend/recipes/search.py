@@ -0,0 +1,58 @@
+"""
+Модуль полнотекстового поиска рецептов.
+
+На PostgreSQL поиск идет по сохраненному вектору recipe.search_vector
+с индексом GIN: название рецепта имеет вес A, названия ингредиентов - B,
+описание - C. Вектор обновляется после фиксации изменений рецепта, его
+ингредиентов и переименования ингредиента (см. recipes.signals), а
+также после загрузки рецептов пачками. На остальных СУБД используется
+поиск по подстроке без ранжирования.
+"""
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+
+from .models import IngredientInRecipe, Recipe
+
+CONFIG = 'russian'
+
+
+def search_vector():
+    ingredient_names = Subquery(
+        IngredientInRecipe.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by().values('recipe').annotate(
+            names=StringAgg('ingredient__name', ' ')
+        ).values('names')
+    )
+    return (SearchVector('name', weight='A', config=CONFIG)
+            + SearchVector(ingredient_names, weight='B', config=CONFIG)
+            + SearchVector('text', weight='C', config=CONFIG))
+
+
+def update_search_vectors(recipe_ids=None):
+    """Пересчет векторов рецептов из списка (по умолчанию всех)."""
+    if connection.vendor != 'postgresql':
+        return 0
+    recipes = Recipe.objects.all()
+    if recipe_ids is not None:
+        recipes = recipes.filter(pk__in=recipe_ids)
+    return recipes.update(search_vector=search_vector())
+
+
+def search_recipes(queryset, text):
+    """Рецепты, подходящие под запрос, в порядке релевантности."""
+    if connection.vendor != 'postgresql':
+        return queryset.filter(
+            Q(name__icontains=text)
+            | Q(text__icontains=text)
+            | Exists(IngredientInRecipe.objects.filter(
+                recipe=OuterRef('pk'), ingredient__name__icontains=text
+            ))
+        )
+    query = SearchQuery(text, config=CONFIG, search_type='websearch')
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query)
+    ).order_by('-search_rank', '-pub_date', '-id')
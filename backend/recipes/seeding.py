@@ -0,0 +1,191 @@
+"""
+Модуль генерации синтетических данных для нагрузочного тестирования.
+
+Распределения скошены, как в реальных данных: немногие авторы пишут
+большую часть рецептов, популярные рецепты чаще попадают в избранное
+и списки покупок, популярные ингредиенты и теги встречаются чаще.
+Все записи вставляются пачками через bulk_create, сигналы не
+отправляются, поэтому счетчики, поисковые векторы и итоги списков
+покупок пересчитываются в конце.
+"""
+import random
+from io import BytesIO
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image
+
+from api.cache import bump_generation, model_label
+from users.models import FoodgramUser, Subscription
+from .cart import rebuild_cart_totals
+from .cookable import recipe_ingredient_index
+from .counters import reconcile_recipe_counters, reconcile_recipes_count
+from .csv_import import chunked, load_ingredients
+from .models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                     ShoppingList, Tag)
+from .search import update_search_vectors
+
+PREFIX = 'bench'
+PASSWORD = 'benchmark-password'
+CHUNK_SIZE = 1000
+# Показатель степенного распределения популярности.
+SKEW = 1.1
+TAGS = (
+    ('Завтрак', 'breakfast'), ('Обед', 'lunch'), ('Ужин', 'dinner'),
+    ('Выпечка', 'baking'), ('Суп', 'soup'), ('Салат', 'salad'),
+    ('Десерт', 'dessert'), ('Напиток', 'drink'),
+)
+
+
+class Skewed:
+    """Выбор элементов с весами 1 / rank ** SKEW."""
+
+    def __init__(self, rng, items):
+        self.rng = rng
+        self.items = list(items)
+        self.weights = list(accumulate(
+            1 / rank ** SKEW for rank in range(1, len(self.items) + 1)
+        ))
+
+    def choice(self):
+        return self.rng.choices(self.items, cum_weights=self.weights)[0]
+
+    def sample(self, count):
+        """До count различных элементов."""
+        count = min(count, len(self.items))
+        result = set()
+        for _ in range(count * 3):
+            result.add(self.choice())
+            if len(result) == count:
+                break
+        return result
+
+
+def make_image():
+    buffer = BytesIO()
+    Image.new('RGB', (600, 400), (200, 120, 60)).save(buffer, 'JPEG')
+    storage = Recipe._meta.get_field('image').storage
+    return storage.save('recipes/images/benchmark.jpg',
+                        ContentFile(buffer.getvalue()))
+
+
+def ensure_tags():
+    existing = set(Tag.objects.values_list('slug', flat=True))
+    Tag.objects.bulk_create([
+        Tag(name=name, slug=slug, color=f'#{number:06x}')
+        for number, (name, slug) in enumerate(TAGS, 0x102030)
+        if slug not in existing
+    ], ignore_conflicts=True)
+    return list(Tag.objects.values_list('id', flat=True))
+
+
+def create_users(count):
+    """Создает count пользователей, возвращает id всех тестовых."""
+    start = FoodgramUser.objects.filter(
+        username__startswith=PREFIX
+    ).count()
+    # Хэш пароля вычисляется один раз: он одинаков у всех пользователей.
+    password = make_password(PASSWORD)
+    for chunk in chunked(range(start, start + count), CHUNK_SIZE):
+        FoodgramUser.objects.bulk_create([
+            FoodgramUser(username=f'{PREFIX}{number}',
+                         email=f'{PREFIX}{number}@example.com',
+                         first_name='Тест', last_name=f'Пользователь {number}',
+                         password=password)
+            for number in chunk
+        ])
+    return list(FoodgramUser.objects.filter(
+        username__startswith=PREFIX
+    ).values_list('id', flat=True))
+
+
+class BenchmarkSeeder:
+    """Генерация пользователей, рецептов и связей между ними."""
+
+    def __init__(self, seed=0, chunk_size=CHUNK_SIZE):
+        self.rng = random.Random(seed)
+        self.chunk_size = chunk_size
+
+    def create_recipes(self, count, authors, tags, ingredients):
+        image = make_image()
+        start = Recipe.objects.count()
+        for chunk in chunked(range(start, start + count), self.chunk_size):
+            recipes = Recipe.objects.bulk_create([
+                Recipe(author_id=authors.choice(),
+                       name=f'Рецепт №{number}',
+                       text=f'Описание рецепта {number}. ' * 5,
+                       cooking_time=self.rng.randint(5, 180),
+                       image=image)
+                for number in chunk
+            ])
+            if any(recipe.pk is None for recipe in recipes):
+                # Не все СУБД возвращают ключи из bulk_create.
+                ids = dict(Recipe.objects.filter(
+                    name__in=[recipe.name for recipe in recipes]
+                ).values_list('name', 'id'))
+                for recipe in recipes:
+                    recipe.pk = ids[recipe.name]
+            Recipe.tags.through.objects.bulk_create([
+                Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+                for recipe in recipes
+                for tag_id in tags.sample(self.rng.randint(1, 3))
+            ])
+            IngredientInRecipe.objects.bulk_create([
+                IngredientInRecipe(recipe_id=recipe.pk, ingredient_id=pk,
+                                   amount=self.rng.randint(1, 500))
+                for recipe in recipes
+                for pk in ingredients.sample(self.rng.randint(3, 12))
+            ])
+
+    def skewed(self, ids):
+        """Популярность элементов не зависит от порядка их id."""
+        ids = list(ids)
+        self.rng.shuffle(ids)
+        return Skewed(self.rng, ids)
+
+    def create_links(self, model, users, targets, average, field):
+        """Связи пользователей с рецептами или авторами."""
+        for chunk in chunked(users, self.chunk_size):
+            model.objects.bulk_create([
+                model(**{'user_id': user, field: target})
+                for user in chunk
+                for target in targets.sample(
+                    int(self.rng.expovariate(1 / average))
+                )
+                if model is not Subscription or target != user
+            ], ignore_conflicts=True)
+
+    @transaction.atomic
+    def run(self, users, recipes):
+        if not Ingredient.objects.exists():
+            load_ingredients()
+        tags = self.skewed(ensure_tags())
+        user_ids = create_users(users)
+        authors = self.skewed(user_ids)
+        ingredients = self.skewed(
+            Ingredient.objects.values_list('id', flat=True)
+        )
+        self.create_recipes(recipes, authors, tags, ingredients)
+        popular = self.skewed(Recipe.objects.values_list('id', flat=True))
+        self.create_links(Favorite, user_ids, popular, 10, 'recipe_id')
+        self.create_links(ShoppingList, user_ids, popular, 4, 'recipe_id')
+        self.create_links(Subscription, user_ids, authors, 5, 'author_id')
+        reconcile_recipe_counters()
+        reconcile_recipes_count()
+        update_search_vectors()
+        rebuild_cart_totals()
+        transaction.on_commit(recipe_ingredient_index.invalidate)
+        transaction.on_commit(lambda: bump_generation(*(
+            model_label(model) for model in (
+                Tag, Recipe, IngredientInRecipe, FoodgramUser
+            )
+        )))
+        return {
+            'users': len(user_ids),
+            'recipes': Recipe.objects.count(),
+            'favorites': Favorite.objects.count(),
+            'carts': ShoppingList.objects.count(),
+            'subscriptions': Subscription.objects.count(),
+        }
@@ -0,0 +1,190 @@
+"""Модуль обработчиков сигналов приложения recipes."""
+from contextlib import contextmanager
+from threading import local
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from users.models import FoodgramUser
+from .cart import change_cart_totals, rebuild_cart_totals, rebuild_recipe_carts
+from .catalogs import ingredient_index, tag_slugs
+from .cookable import recipe_ingredient_index
+from .counters import change_counter
+from .models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                     ShoppingList, Tag, UnitConversion)
+from .search import update_search_vectors
+
+# Модель-источник: (модель счетчика, поле ссылки, поле счетчика).
+COUNTERS = {
+    Favorite: (Recipe, 'recipe_id', 'favorites_count'),
+    ShoppingList: (Recipe, 'recipe_id', 'in_carts_count'),
+    Recipe: (FoodgramUser, 'author_id', 'recipes_count'),
+}
+
+# Стек пакетов открытых блоков recipe_batches в потоке.
+pending = local()
+
+
+class RecipeBatch:
+    """Вызов action после фиксации с накопленными id рецептов."""
+
+    def __init__(self, action, recipe_ids):
+        self.action = action
+        self.recipe_ids = set(recipe_ids)
+
+    def __call__(self):
+        self.action(sorted(self.recipe_ids))
+
+
+@contextmanager
+def recipe_batches():
+    """
+    Блок atomic, в котором вызовы on_commit_for_recipes копятся.
+
+    При успешном выходе из блока для каждого действия регистрируется
+    один обработчик on_commit со всеми id. Регистрация идет внутри блока,
+    поэтому откат блока или внешней точки сохранения отменяет ее вместе
+    с изменениями. id из отмененных вложенных точек сохранения остаются
+    в пакете: действия пересчитывают данные по текущему состоянию базы,
+    лишний id стоит только лишнего пересчета.
+    """
+    stack = pending.__dict__.setdefault('stack', [])
+    batches = {}
+    with transaction.atomic():
+        stack.append(batches)
+        try:
+            yield
+        finally:
+            stack.pop()
+        for action, recipe_ids in batches.items():
+            transaction.on_commit(RecipeBatch(action, recipe_ids))
+
+
+def on_commit_for_recipes(action, recipe_ids):
+    """
+    Вызов action с id рецептов после фиксации.
+
+    Внутри recipe_batches обработчики строк рецепта, вызываемые для
+    каждой строки, дают один пересчет на блок вместо N одинаковых;
+    вне блока action регистрируется на каждый вызов.
+    """
+    stack = pending.__dict__.get('stack')
+    if stack:
+        stack[-1].setdefault(action, set()).update(recipe_ids)
+    else:
+        transaction.on_commit(RecipeBatch(action, recipe_ids))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    """Сброс индекса ингредиентов после фиксации изменений."""
+    transaction.on_commit(ingredient_index.invalidate)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tag_slugs(**kwargs):
+    """Сброс справочника тегов после фиксации изменений."""
+    transaction.on_commit(tag_slugs.invalidate)
+
+
+@receiver((post_save, pre_delete), sender=Tag)
+def touch_tag_recipes(instance, created=False, **kwargs):
+    """Изменение тега меняет представление его рецептов."""
+    if created:
+        return
+    Recipe.objects.filter(tags=instance).update(updated_at=timezone.now())
+
+
+@receiver((post_save, pre_delete), sender=Ingredient)
+def touch_ingredient_recipes(instance, created=False, **kwargs):
+    """Изменение ингредиента меняет представление его рецептов."""
+    if created:
+        return
+    Recipe.objects.filter(
+        ingredients=instance
+    ).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=FoodgramUser)
+def touch_author_recipes(instance, created, update_fields=None, **kwargs):
+    """Рецепты содержат данные автора."""
+    if created or (update_fields is not None
+                   and set(update_fields) == {'last_login'}):
+        return
+    Recipe.objects.filter(author=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(instance, **kwargs):
+    on_commit_for_recipes(update_search_vectors, [instance.pk])
+
+
+@receiver((post_save, post_delete), sender=IngredientInRecipe)
+def update_ingredients_search_vector(instance, **kwargs):
+    on_commit_for_recipes(update_search_vectors, [instance.recipe_id])
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def refresh_recipe_ingredient_index(instance, **kwargs):
+    """Ингредиенты рецепта перечитываются после фиксации изменений."""
+    on_commit_for_recipes(recipe_ingredient_index.refresh, [instance.pk])
+
+
+@receiver((post_save, post_delete), sender=IngredientInRecipe)
+def refresh_ingredient_rows(instance, **kwargs):
+    on_commit_for_recipes(recipe_ingredient_index.refresh,
+                          [instance.recipe_id])
+
+
+@receiver(post_save, sender=Ingredient)
+def update_renamed_ingredient_recipes(instance, created, **kwargs):
+    """Название и единица ингредиента входят в поиск и итоги корзин."""
+    if created:
+        return
+    recipe_ids = list(IngredientInRecipe.objects.filter(
+        ingredient=instance
+    ).values_list('recipe_id', flat=True))
+    on_commit_for_recipes(update_search_vectors, recipe_ids)
+    on_commit_for_recipes(rebuild_recipe_carts, recipe_ids)
+
+
+@receiver(post_save, sender=ShoppingList)
+def add_to_cart_totals(instance, created, **kwargs):
+    if created:
+        change_cart_totals(instance.user_id, [instance.recipe_id], 1)
+
+
+@receiver(pre_delete, sender=ShoppingList)
+def remove_from_cart_totals(instance, **kwargs):
+    # pre_delete: при каскадном удалении рецепта его ингредиенты еще
+    # не удалены.
+    change_cart_totals(instance.user_id, [instance.recipe_id], -1)
+
+
+@receiver((post_save, post_delete), sender=IngredientInRecipe)
+def rebuild_ingredient_rows_cart_totals(instance, **kwargs):
+    """Итоги корзин зависят только от ингредиентов рецепта."""
+    on_commit_for_recipes(rebuild_recipe_carts, [instance.recipe_id])
+
+
+@receiver((post_save, post_delete), sender=UnitConversion)
+def rebuild_all_cart_totals(**kwargs):
+    transaction.on_commit(rebuild_cart_totals)
+
+
+def increment_counter(sender, instance, created, **kwargs):
+    if created:
+        model, link, field = COUNTERS[sender]
+        change_counter(model, getattr(instance, link), field, 1)
+
+
+def decrement_counter(sender, instance, **kwargs):
+    model, link, field = COUNTERS[sender]
+    change_counter(model, getattr(instance, link), field, -1)
+
+
+for counted_model in COUNTERS:
+    post_save.connect(increment_counter, sender=counted_model)
+    post_delete.connect(decrement_counter, sender=counted_model)
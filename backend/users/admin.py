@@ -8,7 +8,8 @@ from . import models
 class FoodgramUserAdmin(UserAdmin):
     """Класс управления отображением данных пользователя Foodgram."""
     list_display = ('id', 'username', 'email', 'password', 'first_name',
-                    'last_name')
+                    'last_name', 'recipes_count')
+    readonly_fields = ('recipes_count',)
     list_display_links = ('id', 'username')
     list_filter = ('username', 'email')
     search_fields = ('username', 'email', 'first_name', 'last_name')
@@ -38,6 +38,11 @@ class FoodgramUser(AbstractUser):
         help_text='Укажите фамилию пользователя',
         blank=True,
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов'
+    )
 
     class Meta:
         ordering = ('id',)